@@ -1,6 +1,14 @@
 import json
+import os
 import re
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+try:  # optional, deutlich schnellerer Decoder
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 PATH = "./abgb.jsonl"   # liegt laut Screenshot im Projektstamm
 
@@ -9,59 +17,80 @@ PID_CANDIDATE_FIELDS = [
     "paragraph_id", "paragraph", "para", "section", "heading", "title", "rubrum"
 ]
 
-total_lines = 0
-parsed_lines = 0
-json_errors = 0
-pid_missing = 0
+# Einmal kompilierte Muster (normalize_pid läuft pro Zeile)
+_RX_ANLAGE = re.compile(r"\b(anhang|anlage|verzeichnis|schlußformel|schlussformel)\b", re.IGNORECASE)
+_RX_ATTACHMENT = re.compile(r"\b(anhang|anlage|verzeichnis)\b", re.IGNORECASE)
+_RX_PARA_STRIP = re.compile(r"(?i)\b(paragraph|artikel|art\.?)\b")
+_RX_NUM = re.compile(r"^0*(\d+)([a-zA-Z]?)$")
+# Schnellpfad für den Normalfall "§ 1", "§1a", "17b": ein einziger Match
+_RX_PID_FAST = re.compile(r"\s*§*\s*0*(\d+)([a-zA-Z]?)\s*")
 
-numeric_set = set()      # {1, 2, 3, ...}
-letter_ids = set()       # {"1a", "17b", ...}
-raw_pids = []            # z.B. "§ 1", "§ 17a", "Anlage 1"
-attachments = []         # Anlagen/Anhang heuristisch
-pid_source_stats = Counter()
+# Ab dieser Dateigröße lohnt sich das Verteilen auf mehrere Prozesse
+PARALLEL_MIN_BYTES = 50 * 1024 * 1024
 
 def extract_pid(entry):
-    """Suche die Paragraph-ID in verschiedenen Feldern."""
+    """Suche die Paragraph-ID in verschiedenen Feldern. Gibt (feld, id) zurück."""
     for f in PID_CANDIDATE_FIELDS:
         v = entry.get(f)
         if isinstance(v, str) and v.strip():
-            pid_source_stats[f] += 1
-            return v.strip()
-    return ""
+            return f, v.strip()
+    return None, ""
 
+@lru_cache(maxsize=4096)
 def normalize_pid(pid: str):
-    """Gibt (numeric:int|None, letter:str|None, pid_clean:str) zurück."""
+    """
+    Gibt (numeric:int|None, letter:str|None, pid_clean:str) zurück.
+    Memoisiert: dieselbe ID taucht in NOR-/Artikel-Exporten mehrfach auf.
+    """
+    m = _RX_PID_FAST.fullmatch(pid)
+    if m:
+        return (int(m.group(1)), m.group(2) or None, pid.replace("§", "").strip())
+
     # Anlage/Anhang früh filtern
-    if re.search(r"\b(anhang|anlage|verzeichnis|schlußformel|schlussformel)\b", pid, re.IGNORECASE):
+    if _RX_ANLAGE.search(pid):
         return (None, None, pid)
 
     # Häufige Formen: "§ 1", "§1a", "1", "1a", "Paragraph 1", "Artikel 2"
     # alles Kleinbuchstaben + § entfernen
     p = pid.replace("§", "").strip()
-    p = re.sub(r"(?i)\b(paragraph|artikel|art\.?)\b", "", p).strip()
+    p = _RX_PARA_STRIP.sub("", p).strip()
 
     # nur die erste Nummer+optional Buchstabe nehmen
-    m = re.match(r"^0*(\d+)([a-zA-Z]?)$", p)
+    m = _RX_NUM.match(p)
     if m:
         n = int(m.group(1))
         letter = m.group(2) or None
         return (n, letter, p)
     return (None, None, pid)
 
-with open(PATH, "r", encoding="utf-8") as f:
-    for line in f:
-        total_lines += 1
+def analyse_lines(lines):
+    """
+    Wertet eine Folge von JSONL-Zeilen (bytes) aus. Läuft auch als Worker in
+    einem eigenen Prozess, daher ohne globalen Zustand.
+
+    Rückgabe: (zähler, pid_source_stats, numeric_set, letter_ids, raw_pids, attachments)
+    """
+    counts = Counter()
+    pid_source_stats = Counter()
+    numeric_set = set()      # {1, 2, 3, ...}
+    letter_ids = set()       # {"1a", "17b", ...}
+    raw_pids = []            # z.B. "§ 1", "§ 17a", "Anlage 1"
+    attachments = []         # Anlagen/Anhang heuristisch
+
+    for line in lines:
+        counts["total"] += 1
         try:
-            obj = json.loads(line)
-            parsed_lines += 1
+            obj = _json_loads(line)
+            counts["parsed"] += 1
         except json.JSONDecodeError:
-            json_errors += 1
+            counts["json_errors"] += 1
             continue
 
-        pid = extract_pid(obj)
+        field, pid = extract_pid(obj)
         if not pid:
-            pid_missing += 1
+            counts["pid_missing"] += 1
             continue
+        pid_source_stats[field] += 1
 
         raw_pids.append(pid)
         n, letter, cleaned = normalize_pid(pid)
@@ -71,32 +100,68 @@ with open(PATH, "r", encoding="utf-8") as f:
                 letter_ids.add(f"{n}{letter}")
         else:
             # kein numerischer § → prüfen, ob Anlage
-            if re.search(r"\b(anhang|anlage|verzeichnis)\b", pid, re.IGNORECASE):
+            if _RX_ATTACHMENT.search(pid):
                 attachments.append(pid)
 
-# Lücken berechnen (nur numerische §§ zwischen min…max)
-if numeric_set:
-    min_n = min(numeric_set)
-    max_n = max(numeric_set)
-    expected = set(range(min_n, max_n + 1))
-    missing = sorted(expected - numeric_set)
-else:
-    min_n = max_n = None
-    missing = []
-
-print("\n📊 Analyse ABGB.jsonl")
-print("========================================")
-print(f"Gesamtzeilen:            {total_lines}")
-print(f"→ davon parsebar:        {parsed_lines}")
-print(f"→ JSON-Fehler:           {json_errors}")
-print(f"→ ohne ermittelbare ID:  {pid_missing}")
-print()
-print(f"Numerische Paragraphen:  {len(numeric_set)} (Bereich: §{min_n} – §{max_n})")
-print(f"Buchstaben-Paragraphen:  {len(letter_ids)}  (Beispiel: {sorted(list(letter_ids))[:10]})")
-print(f"Anhänge/Anlagen:         {len(attachments)}  (Beispiel: {attachments[:5]})")
-print()
-print(f"Fehlende Paragraphen ({len(missing)}): {missing[:100]}")  # erste 100 anzeigen
-print()
-print("Feld, aus dem die ID kam (Top 5):")
-for k, v in pid_source_stats.most_common(5):
-    print(f"  {k}: {v}")
+    return counts, pid_source_stats, numeric_set, letter_ids, raw_pids, attachments
+
+def analyse_file(path):
+    """
+    Liest die Datei und wertet sie aus – ab PARALLEL_MIN_BYTES verteilt auf
+    alle Kerne (ein Block pro Prozess), darunter seriell.
+    """
+    if os.path.getsize(path) < PARALLEL_MIN_BYTES:
+        with open(path, "rb") as f:
+            return analyse_lines(f)
+
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    workers = os.cpu_count() or 1
+    size = max(1, -(-len(lines) // workers))
+    chunks = [lines[i:i + size] for i in range(0, len(lines), size)]
+
+    counts, pid_source_stats = Counter(), Counter()
+    numeric_set, letter_ids, raw_pids, attachments = set(), set(), [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map liefert in Eingabereihenfolge → raw_pids/attachments bleiben geordnet
+        for c, s, num, let, raw, att in pool.map(analyse_lines, chunks):
+            counts += c
+            pid_source_stats += s
+            numeric_set |= num
+            letter_ids |= let
+            raw_pids.extend(raw)
+            attachments.extend(att)
+    return counts, pid_source_stats, numeric_set, letter_ids, raw_pids, attachments
+
+def main():
+    counts, pid_source_stats, numeric_set, letter_ids, raw_pids, attachments = analyse_file(PATH)
+
+    # Lücken berechnen (nur numerische §§ zwischen min…max)
+    if numeric_set:
+        min_n = min(numeric_set)
+        max_n = max(numeric_set)
+        # ein Durchlauf über den Bereich, bereits sortiert – kein Hilfs-Set nötig
+        missing = [n for n in range(min_n, max_n + 1) if n not in numeric_set]
+    else:
+        min_n = max_n = None
+        missing = []
+
+    print("\n📊 Analyse ABGB.jsonl")
+    print("========================================")
+    print(f"Gesamtzeilen:            {counts['total']}")
+    print(f"→ davon parsebar:        {counts['parsed']}")
+    print(f"→ JSON-Fehler:           {counts['json_errors']}")
+    print(f"→ ohne ermittelbare ID:  {counts['pid_missing']}")
+    print()
+    print(f"Numerische Paragraphen:  {len(numeric_set)} (Bereich: §{min_n} – §{max_n})")
+    print(f"Buchstaben-Paragraphen:  {len(letter_ids)}  (Beispiel: {sorted(list(letter_ids))[:10]})")
+    print(f"Anhänge/Anlagen:         {len(attachments)}  (Beispiel: {attachments[:5]})")
+    print()
+    print(f"Fehlende Paragraphen ({len(missing)}): {missing[:100]}")  # erste 100 anzeigen
+    print()
+    print("Feld, aus dem die ID kam (Top 5):")
+    for k, v in pid_source_stats.most_common(5):
+        print(f"  {k}: {v}")
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,36 @@
-from typing import Iterator, Literal, Dict, List, Optional
+from typing import Iterable, Iterator, Literal, Dict, List, Optional, Sequence, Tuple
 import json
 import logging
-import re
-import time
 import urllib.parse as _url
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 
+from .config import BUNDESNORMEN_DOC_BASE, DEFAULT_MAX_WORKERS, NORMDOKUMENT_URL
 from .types import LawItem
-from .toc_parser import get_current_abgb_paragraphs
+from .toc_parser import get_toc_paragraphs
 from .html_parser import (
+    ParsedParagraph,
     resolve_nor_urls_from_toc_url,
-    fetch_paragraph_text_via_html,
-    extract_para_id,
+    fetch_page,
+    fetch_paragraph,
+    parse_paragraph,
 )
-from .http_client import HttpClient, get_default_http_client
+from .concurrency import iter_ordered, parse_process_pool
+from .http_client import HttpClient, RateLimiter, get_default_http_client
+from .patterns import RX_NOR
 from .records import FullRecord
-from .writer import write_jsonl_from_docrefs
+from .writer import JsonlWriter, utc_timestamp, write_jsonl_from_docrefs
 from .full_export import build_complete_numeric
 
 Granularity = Literal["para", "nor"]
 
 logger = logging.getLogger(__name__)
 
+# Fortschritt alle 16 Dokumente loggen (Zweierpotenz → Bitmaske statt Division)
+PROGRESS_LOG_STEP = 16
+_PROGRESS_MASK = PROGRESS_LOG_STEP - 1
+
 
 # ------------------------------------------------------------
 # Gesetzesindex laden
@@ -38,80 +47,152 @@ def _load_laws_json() -> list[dict]:
         return json.load(f)
 
 
+@lru_cache(maxsize=1)
+def _laws_by_number() -> Dict[str, dict]:
+    """
+    Index Gesetzesnummer → Eintrag, einmal pro Prozess aufgebaut.
+    Bei doppelten Nummern gewinnt (wie bei der linearen Suche) der erste Eintrag.
+    """
+    index: Dict[str, dict] = {}
+    for law in _load_laws_json():
+        index.setdefault(str(law.get("gesetzesnummer")), law)
+    return index
+
+
 def _find_law_entry(gesetzesnummer: str) -> Optional[dict]:
     """
     Sucht den Eintrag zu einer Gesetzesnummer in ris_gesetze.json.
     """
-    for law in _load_laws_json():
-        if str(law.get("gesetzesnummer")) == str(gesetzesnummer):
-            return law
-    return None
+    return _laws_by_number().get(str(gesetzesnummer))
 
 
 # ------------------------------------------------------------
 # TOC → Docrefs (NOR- oder §-Links)
 # ------------------------------------------------------------
 
-def _build_docrefs_from_toc(
+_NOR_DOC_PREFIX = BUNDESNORMEN_DOC_BASE + "/"
+
+
+def _nor_from_url(url: str) -> str:
+    """
+    NOR-Nummer aus einer Dokument-URL. Kanonische URLs
+    ({BUNDESNORMEN_DOC_BASE}/NOR…/NOR….html) werden ohne Regex zerlegt,
+    alles andere (z. B. der §-Seiten-Fallback) per RX_NOR.
+    """
+    if url.startswith(_NOR_DOC_PREFIX):
+        start = len(_NOR_DOC_PREFIX)
+        end = url.find("/", start)
+        seg = url[start:end]
+        if (
+            end - start >= 8
+            and seg[:3].upper() == "NOR"
+            and seg.isascii()
+            and seg[3:].isdigit()
+        ):
+            return seg
+    m = RX_NOR.search(url)
+    return m.group(1) if m else ""
+
+
+def _iter_docrefs_from_toc(
     gesetzesnummer: str,
-    paragraphs: List[str],
+    paragraphs: Sequence[str],
     granularity: Granularity,
     *,
     client: HttpClient | None = None,
-) -> List[Dict[str, str]]:
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    limiter: RateLimiter | None = None,
+) -> Iterator[Dict[str, str]]:
     """
-    Baut eine Liste von Dokument-Referenzen (URL + evtl. NOR-ID) aus dem Inhaltsverzeichnis.
+    Liefert die Dokument-Referenzen (URL + evtl. NOR-ID) aus dem
+    Inhaltsverzeichnis als Generator.
+
+    Im NOR-Modus werden die §-Seiten von `max_workers` Threads parallel
+    aufgelöst; Docrefs werden in TOC-Reihenfolge geliefert, sobald die
+    jeweilige §-Seite aufgelöst ist – Aufrufer können also schon Texte laden,
+    während weiter hinten noch aufgelöst wird. Mit `limiter` teilen sich die
+    Auflösungs-Requests den Takt mit den Text-Abrufen des Aufrufers.
     """
-    docrefs: List[Dict[str, str]] = []
+    # Nur "Paragraf" variiert – der Rest der Query wird einmal pro Aufruf kodiert
+    url_prefix = NORMDOKUMENT_URL + "?" + _url.urlencode(
+        {"Abfrage": "Bundesnormen", "Gesetzesnummer": gesetzesnummer}
+    ) + "&Paragraf="
+    url_suffix = "&Uebergangsrecht=&Anlage=&Artikel="
+    toc_urls = [
+        url_prefix + _url.quote_plus(pid.replace("§", "").strip()) + url_suffix
+        for pid in paragraphs
+    ]
 
     # Einfacher Paragraph-Modus
     if granularity == "para":
-        for pid in paragraphs:
-            pid_clean = pid.replace("§", "").strip()
-            url = "https://www.ris.bka.gv.at/NormDokument.wxe?" + _url.urlencode(
-                {
-                    "Abfrage": "Bundesnormen",
-                    "Gesetzesnummer": gesetzesnummer,
-                    "Paragraf": pid_clean,
-                    "Uebergangsrecht": "",
-                    "Anlage": "",
-                    "Artikel": "",
-                }
-            )
-            docrefs.append({"id": "", "url": url})
-        return docrefs
+        for url in toc_urls:
+            yield {"id": "", "url": url}
+        return
 
     # NOR-Modus: aus TOC alle NOR-Dokumente herauslösen
-    seen_nor = set()
-    for pid in paragraphs:
-        pid_clean = pid.replace("§", "").strip()
-        toc_url = "https://www.ris.bka.gv.at/NormDokument.wxe?" + _url.urlencode(
-            {
-                "Abfrage": "Bundesnormen",
-                "Gesetzesnummer": gesetzesnummer,
-                "Paragraf": pid_clean,
-                "Uebergangsrecht": "",
-                "Anlage": "",
-                "Artikel": "",
-            }
-        )
+    def _resolve(toc_url: str) -> List[str]:
+        if limiter is not None:
+            limiter.acquire()
         try:
-            nor_urls = resolve_nor_urls_from_toc_url(toc_url, client=client)
+            return resolve_nor_urls_from_toc_url(toc_url, client=client)
         except Exception:
-            nor_urls = [toc_url]
+            return [toc_url]
 
-        for nu in nor_urls:
-            m = re.search(r"(NOR\d{5,})", nu, re.IGNORECASE)
-            if m:
-                nor = m.group(1)
-                if nor in seen_nor:
-                    continue
-                seen_nor.add(nor)
-                docrefs.append({"id": nor, "url": nu})
-            else:
-                docrefs.append({"id": "", "url": nu})
+    # Mehrfach genannte §§ (z. B. "§ 1" und "1") nur einmal auflösen
+    toc_urls = list(dict.fromkeys(toc_urls))
 
-    return docrefs
+    seen_nor = set()
+    workers = max(1, max_workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Höchstens 2 × workers §-Seiten voraus auflösen; Reihenfolge fest →
+        # Dedup bleibt deterministisch; dedupliziert wird im konsumierenden
+        # Thread, daher ohne Lock
+        for nor_urls in iter_ordered(pool, _resolve, toc_urls, 2 * workers):
+            for nu in nor_urls:
+                nor = _nor_from_url(nu)
+                if nor:
+                    if nor in seen_nor:
+                        continue
+                    seen_nor.add(nor)
+                    yield {"id": nor, "url": nu}
+                else:
+                    yield {"id": "", "url": nu}
+
+
+def _fetch_docrefs_ordered(
+    docrefs: Iterable[Dict[str, str]],
+    *,
+    client: HttpClient,
+    delay: float,
+    max_workers: int,
+    parse_workers: int = 0,
+    limiter: RateLimiter | None = None,
+) -> Iterator[Tuple[Dict[str, str], ParsedParagraph]]:
+    """
+    Lädt die Docref-Seiten parallel und liefert (ref, ParsedParagraph) in
+    Eingabereihenfolge.
+
+    `delay` ist das Mindestintervall zwischen zwei gestarteten Requests (über
+    alle Threads; ein übergebener `limiter` ersetzt ihn). Es sind höchstens 2 × max_workers Seiten gleichzeitig
+    unterwegs bzw. gepuffert – der Generator bleibt also auch bei langsamen
+    Konsumenten speicherschonend. Fehler werden beim Abholen weitergereicht.
+
+    parse_workers > 0: Die Threads laden nur, geparst wird in so vielen
+    Worker-Prozessen (am GIL vorbei) – lohnt sich bei großen Gesetzen.
+    """
+    limiter = limiter or RateLimiter(delay)
+    workers = max(1, max_workers)
+
+    with parse_process_pool(parse_workers) as parse_pool, ThreadPoolExecutor(max_workers=workers) as pool:
+
+        def _fetch(ref: Dict[str, str]) -> Tuple[Dict[str, str], ParsedParagraph]:
+            limiter.acquire()
+            if parse_pool is None or not ref["url"]:
+                return ref, fetch_paragraph(ref["url"], client=client)
+            content, encoding = fetch_page(ref["url"], client=client)
+            return ref, parse_pool.submit(parse_paragraph, content, encoding).result()
+
+        yield from iter_ordered(pool, _fetch, docrefs, 2 * workers)
 
 
 # ------------------------------------------------------------
@@ -125,52 +206,74 @@ def iter_law(
     include_aufgehoben: bool = True,
     delay: float = 1.0,
     client: HttpClient | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    parse_workers: int = 0,
 ) -> Iterator[LawItem]:
     """
     Iteriert über ein Gesetz und liefert LawItem-Objekte.
+
+    Die Seiten werden von `max_workers` Threads vorausgeladen (gedrosselt über
+    `delay`); die Reihenfolge entspricht weiterhin dem Inhaltsverzeichnis.
+    Mit `parse_workers` > 0 wird das HTML in Worker-Prozessen geparst.
     """
-    toc = get_current_abgb_paragraphs(
-        gesetzesnummer=gesetzesnummer,
-        include_aufgehoben=include_aufgehoben,
-    )
-    paragraphs = toc["paragraphs"]
+    paragraphs = get_toc_paragraphs(gesetzesnummer, include_aufgehoben)
 
     client = client or get_default_http_client()
-    docrefs = _build_docrefs_from_toc(gesetzesnummer, paragraphs, granularity, client=client)
-    total = len(docrefs)
+    # Docrefs werden gestreamt: Texte laden, während hinten noch aufgelöst wird.
+    # Im §-Modus ist jeder TOC-Eintrag genau ein Docref, im NOR-Modus steht
+    # die Anzahl erst am Ende fest.
+    # ein Takt für Auflösung und Text-Abrufe – `delay` gilt für alle Requests
+    limiter = RateLimiter(delay)
+    docrefs = _iter_docrefs_from_toc(
+        gesetzesnummer,
+        paragraphs,
+        granularity,
+        client=client,
+        max_workers=max_workers,
+        limiter=limiter,
+    )
+    total = len(paragraphs) if granularity == "para" else None
     logger.info(
-        "[RIS] iter_law: %s Dokument-Referenzen für %s (%s) gefunden (granularity=%s).",
-        total,
+        "[RIS] iter_law: %s TOC-Einträge für %s (%s) (granularity=%s).",
+        len(paragraphs),
         law_name,
         gesetzesnummer,
         granularity,
     )
 
-    for idx, ref in enumerate(docrefs, start=1):
-        parsed = fetch_paragraph_text_via_html(ref["url"], client=client)
-        heading = (parsed.get("heading") or "").strip()
-        text = (parsed.get("text") or "").strip()
-        nor = (parsed.get("nor") or ref.get("id") or "").strip()
-        para_id = extract_para_id(heading or text)
+    fetched = _fetch_docrefs_ordered(
+        docrefs,
+        client=client,
+        delay=delay,
+        max_workers=max_workers,
+        parse_workers=parse_workers,
+        limiter=limiter,
+    )
+    log_progress = logger.isEnabledFor(logging.INFO)
+    # für alle Items gleiche Felder nur einmal binden; retrieved_at ist der
+    # Startzeitpunkt des Laufs (UTC), wie bei den JSONL-Exporten
+    make_item = partial(
+        LawItem,
+        law=law_name,
+        gesetzesnummer=gesetzesnummer,
+        source="RIS HTML",
+        retrieved_at=utc_timestamp(),
+    )
+    for idx, (ref, parsed) in enumerate(fetched, start=1):
+        heading, text, nor, para_id = parsed
+        nor = nor or (ref.get("id") or "").strip()
 
-        if total and (idx == total or idx % 10 == 0):
-            logger.info("  ║ Fortschritt (iter_law/NOR): %s/%s", idx, total)
+        if log_progress and (idx == total or not idx & _PROGRESS_MASK):
+            logger.info("  ║ Fortschritt (iter_law/NOR): %s/%s", idx, total or "?")
 
-        yield LawItem(
-            law=law_name,
-            gesetzesnummer=gesetzesnummer,
+        yield make_item(
             paragraph_id=para_id or None,
             heading=heading or None,
             text=text or None,
             url=ref["url"],
-            source="RIS HTML",
             document_number=nor or None,
-            retrieved_at="",
         )
 
-        if delay:
-            time.sleep(delay)
-
 
 # ------------------------------------------------------------
 # TOC-/NOR-Export in JSONL (CLI mode=toc)
@@ -184,45 +287,53 @@ def write_jsonl(
     include_aufgehoben: bool = True,
     delay: float = 1.0,
     client: HttpClient | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
 ) -> int:
     """
     TOC/NOR-basierter Export in eine JSONL-Datei.
     Dieses Format ist das „einfache“ Ausgabeformat für mode=toc.
     """
-    toc = get_current_abgb_paragraphs(
-        gesetzesnummer=gesetzesnummer,
-        include_aufgehoben=include_aufgehoben,
-    )
-    paragraphs = toc["paragraphs"]
+    paragraphs = get_toc_paragraphs(gesetzesnummer, include_aufgehoben)
 
     client = client or get_default_http_client()
-    docrefs = _build_docrefs_from_toc(gesetzesnummer, paragraphs, granularity, client=client)
-    total = len(docrefs)
     logger.info(
-        "[RIS] TOC/NOR-Export %s (%s) – %s Dokument-Referenzen gefunden (granularity=%s).",
+        "[RIS] TOC/NOR-Export %s (%s) – %s TOC-Einträge (granularity=%s).",
         law_name,
         gesetzesnummer,
-        total,
+        len(paragraphs),
         granularity,
     )
 
-    if total == 0:
-        logger.warning(
-            "[RIS] WARNUNG: Keine Dokumente für %s (%s) gefunden.",
-            law_name,
-            gesetzesnummer,
-        )
-        return 0
-
-    return write_jsonl_from_docrefs(
+    # Docrefs als Generator: Texte werden schon geladen, während weitere
+    # §-Seiten noch aufgelöst werden; beide teilen sich den `delay`-Takt
+    limiter = RateLimiter(delay)
+    docrefs = _iter_docrefs_from_toc(
+        gesetzesnummer,
+        paragraphs,
+        granularity,
+        client=client,
+        max_workers=max_workers,
+        limiter=limiter,
+    )
+    rows = write_jsonl_from_docrefs(
         docrefs,
         out_path=out_path,
         delay=delay,
         gesetzesnummer=gesetzesnummer,
         law_name=law_name,
         client=client,
+        max_workers=max_workers,
+        limiter=limiter,
     )
 
+    if rows == 0:
+        logger.warning(
+            "[RIS] WARNUNG: Keine Dokumente für %s (%s) gefunden.",
+            law_name,
+            gesetzesnummer,
+        )
+    return rows
+
 
 # ------------------------------------------------------------
 # Vollständiger Export (CLI mode=full)
@@ -238,6 +349,8 @@ def write_jsonl_full(
     start_num: int = 1,
     end_num: int | None = None,
     client: HttpClient | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    parse_workers: int = 0,
 ) -> int:
     """
     Vollständiger Export eines Gesetzes im „full“-Schema (wie build_complete_numeric).
@@ -250,6 +363,8 @@ def write_jsonl_full(
           wie der numerische Voll-Export (gesetzesnummer, law, unit_type,
           unit, unit_number, date_in_force, date_out_of_force, license,
           status, text, heading, nor, url).
+
+    Mit `parse_workers` > 0 wird das HTML in Worker-Prozessen geparst.
     """
     law_entry = _find_law_entry(gesetzesnummer)
     unit_type = "paragraf"
@@ -270,63 +385,67 @@ def write_jsonl_full(
             unit_type_mixed = (law_entry.get("unit_type") or "paragraf").lower()
 
             # TOC laden und NOR-Docrefs bauen
-            toc = get_current_abgb_paragraphs(
-                gesetzesnummer=gesetzesnummer,
-                include_aufgehoben=include_aufgehoben,
-            )
-            paragraphs = toc["paragraphs"]
-            docrefs = _build_docrefs_from_toc(
+            paragraphs = get_toc_paragraphs(gesetzesnummer, include_aufgehoben)
+            # gestreamt – die Zahl der NOR-Dokumente steht erst am Ende fest;
+            # Auflösung und Text-Abrufe teilen sich den `delay`-Takt
+            limiter = RateLimiter(delay)
+            docrefs = _iter_docrefs_from_toc(
                 gesetzesnummer,
                 paragraphs,
                 "nor",
                 client=client,
+                max_workers=max_workers,
+                limiter=limiter,
             )
-            total = len(docrefs)
             logger.info(
-                "[RIS] NOR-Dokumente für Mischgesetz %s (%s) – %s gefunden.",
+                "[RIS] NOR-Dokumente für Mischgesetz %s (%s) – löse %s TOC-Einträge auf.",
                 law_name,
                 gesetzesnummer,
-                total,
+                len(paragraphs),
             )
 
             written = 0
-            with open(out_path, "w", encoding="utf-8") as f:
-                for idx, ref in enumerate(docrefs, start=1):
-                    parsed = fetch_paragraph_text_via_html(ref["url"], client=client)
-                    heading = (parsed.get("heading") or "").strip()
-                    text = (parsed.get("text") or "").strip()
-                    nor = (parsed.get("nor") or ref.get("id") or "").strip()
-                    para_id = extract_para_id(heading or text)
-
-                    record = FullRecord(
-                        gesetzesnummer=gesetzesnummer,
-                        law=law_name,
-                        unit_type=unit_type_mixed,
-                        # keine reine Nummer wie "1" → para_id/heading als Einheit
-                        unit=para_id or heading or "",
-                        unit_number=para_id or heading or "",
-                        date_in_force=None,
-                        date_out_of_force=None,
-                        license=None,
+            fetched = _fetch_docrefs_ordered(
+                docrefs,
+                client=client,
+                delay=delay,
+                max_workers=max_workers,
+                parse_workers=parse_workers,
+                limiter=limiter,
+            )
+            log_progress = logger.isEnabledFor(logging.INFO)
+            # für alle Datensätze gleiche Felder nur einmal binden
+            make_record = partial(
+                FullRecord,
+                gesetzesnummer=gesetzesnummer,
+                law=law_name,
+                unit_type=unit_type_mixed,
+                date_in_force=None,
+                date_out_of_force=None,
+                license=None,
+            )
+            # Serialisieren/Schreiben übernimmt ein eigener Writer-Thread
+            with JsonlWriter(out_path) as out:
+                for idx, (ref, parsed) in enumerate(fetched, start=1):
+                    heading, text, nor, para_id = parsed
+                    nor = nor or (ref.get("id") or "").strip()
+                    # keine reine Nummer wie "1" → para_id/heading als Einheit
+                    unit = para_id or heading or ""
+
+                    record = make_record(
+                        unit=unit,
+                        unit_number=unit,
                         status="ok" if text else "resolve_failed",
                         text=text,
                         heading=heading,
                         nor=nor or None,
                         url=ref["url"],
                     )
-                    f.write(json.dumps(record.to_dict(), ensure_ascii=False))
-                    f.write("\n")
+                    out.write(record.to_dict())
                     written += 1
 
-                    if total and (idx == total or idx % 10 == 0):
-                        logger.info(
-                            "  ║ Fortschritt (full/Mischgesetz): %s/%s",
-                            idx,
-                            total,
-                        )
-
-                    if delay:
-                        time.sleep(delay)
+                    if log_progress and not idx & _PROGRESS_MASK:
+                        logger.info("  ║ Fortschritt (full/Mischgesetz): %s", idx)
 
             logger.info(
                 "[RIS] ✅ Mischgesetz-Export abgeschlossen: %s Einträge für %s in %s gespeichert.",
@@ -366,4 +485,6 @@ def write_jsonl_full(
         end_num=end_num,
         unit_type=unit_type,
         client=client,
+        max_workers=max_workers,
+        parse_workers=parse_workers,
     )
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# RIS-Seiten ändern sich pro Fassung selten – 30 Tage als Standard-Lebensdauer
+DEFAULT_TTL = 30 * 86400
+
+# Kanonische NOR-Dokumente (…/Bundesnormen/NOR…/NOR….html) sind unveränderlich –
+# eine neue Fassung bekommt eine neue NOR. Einträge laufen daher nie ab.
+NOR_DOCUMENT_TTL = float("inf")
+
+# "Gibt es nicht" (404) gilt kürzer als Inhalte: neue Einheiten (z. B. § 2a nach
+# einer Novelle) sollen spätestens nach einem Tag auffallen
+NOT_FOUND_TTL = 24 * 3600
+
+# Anzahl der zuletzt benutzten Einträge, die zusätzlich im Speicher gehalten
+# werden (RIS-Seiten ~100 KB → grob 50 MB)
+DEFAULT_MEMORY_ITEMS = 512
+
+# Schlüssel im <sha1>.json-Sidecar für das Zeichen-Encoding der Antwort (kein Header)
+_ENCODING_KEY = "encoding"
+
+CACHE_DIR_ENV = "RIS_LAW_CACHE_DIR"
+# gesetzt (z. B. "1"): Cache nicht lesen, nur neu befüllen – für einen frischen Abzug
+CACHE_REFRESH_ENV = "RIS_LAW_CACHE_REFRESH"
+
+
+class ResponseCache:
+    """
+    Einfacher inhaltsadressierter Disk-Cache für Antwort-Bodies.
+
+    Ablage: <directory>/<sha1[:2]>/<sha1>.gz, Schlüssel ist in der Regel die
+    vollständige URL (inkl. Query). Schreibzugriffe sind atomar (tmp + rename),
+    damit parallele Worker sich nicht gegenseitig halbe Dateien liefern.
+    ETag/Last-Modified der Antwort liegen, falls vorhanden, daneben als
+    <sha1>.json – abgelaufene Einträge lassen sich so per 304 bestätigen –,
+    ebenso das Encoding der Antwort (`encoding()`).
+    404-Antworten werden als leere <sha1>.404-Markierung vermerkt
+    (`not_found_ttl`), damit z. B. das Ende einer a..z-Suffixkette bei
+    einem erneuten Lauf ohne Request feststeht.
+
+    refresh=True: get() liefert nie einen Treffer, set() schreibt weiterhin –
+    der Cache wird also mit frischen Antworten überschrieben.
+
+    Vor der Platte liegt ein kleiner LRU-Speicher (`memory_items` Einträge),
+    damit wiederholte Zugriffe im selben Prozess ohne Dateizugriff und
+    Entpacken auskommen; 0 schaltet ihn ab.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        ttl: Optional[float] = DEFAULT_TTL,
+        *,
+        refresh: bool = False,
+        memory_items: int = DEFAULT_MEMORY_ITEMS,
+        not_found_ttl: Optional[float] = NOT_FOUND_TTL,
+    ) -> None:
+        self.directory = Path(directory).expanduser()
+        self.ttl = ttl
+        self.not_found_ttl = not_found_ttl
+        self.refresh = refresh
+        self.memory_items = max(0, memory_items)
+        self._memory: OrderedDict[str, tuple[float, bytes, Optional[str]]] = OrderedDict()
+        self._memory_lock = threading.Lock()
+
+    def _remember(
+        self, key: str, stored_at: float, content: bytes, encoding: Optional[str]
+    ) -> None:
+        if not self.memory_items:
+            return
+        with self._memory_lock:
+            self._memory[key] = (stored_at, content, encoding)
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.directory / digest[:2] / f"{digest}.gz"
+
+    def get(self, key: str, *, ttl: Optional[float] = None) -> Optional[bytes]:
+        """Eintrag lesen; `ttl` überschreibt die Standard-Lebensdauer für diesen Aufruf."""
+        if self.refresh:
+            return None
+        max_age = self.ttl if ttl is None else ttl
+        with self._memory_lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                self._memory.move_to_end(key)
+        if hit is not None and (max_age is None or time.time() - hit[0] <= max_age):
+            return hit[1]
+        return self._read(key, max_age)
+
+    def _read(self, key: str, max_age: Optional[float]) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            stored_at = path.stat().st_mtime
+            if max_age is not None and time.time() - stored_at > max_age:
+                return None
+            content = gzip.decompress(path.read_bytes())
+            self._remember(key, stored_at, content, self._meta(key).get(_ENCODING_KEY))
+            return content
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError) as exc:
+            logger.warning("[Cache] Eintrag %s unlesbar: %s", path, exc)
+            return None
+
+    def validators(self, key: str) -> dict[str, str]:
+        """
+        Header für eine bedingte Anfrage (If-None-Match / If-Modified-Since)
+        zu einem – ggf. abgelaufenen – Eintrag; leer, wenn keine bekannt sind.
+        """
+        if self.refresh:
+            return {}
+        return {name: value for name, value in self._meta(key).items() if name != _ENCODING_KEY}
+
+    def encoding(self, key: str) -> Optional[str]:
+        """Encoding der zwischengespeicherten Antwort, falls beim set() bekannt."""
+        with self._memory_lock:
+            hit = self._memory.get(key)
+        if hit is not None:
+            return hit[2]
+        return self._meta(key).get(_ENCODING_KEY)
+
+    def _meta(self, key: str) -> dict[str, str]:
+        try:
+            return json.loads(self._path(key).with_suffix(".json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def revalidate(self, key: str) -> Optional[bytes]:
+        """
+        Server hat 304 geantwortet: Eintrag ungeachtet seines Alters liefern
+        und als frisch markieren.
+        """
+        content = self._read(key, None)
+        if content is not None:
+            try:
+                os.utime(self._path(key))
+            except OSError:
+                pass
+            self._remember(key, time.time(), content, self._meta(key).get(_ENCODING_KEY))
+        return content
+
+    def is_not_found(self, key: str) -> bool:
+        """Liegt eine noch gültige 404-Markierung für `key` vor?"""
+        if self.refresh:
+            return False
+        try:
+            marked_at = self._path(key).with_suffix(".404").stat().st_mtime
+        except OSError:
+            return False
+        return self.not_found_ttl is None or time.time() - marked_at <= self.not_found_ttl
+
+    def set_not_found(self, key: str) -> None:
+        path = self._path(key).with_suffix(".404")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+        except OSError as exc:
+            logger.warning("[Cache] Konnte %s nicht schreiben: %s", path, exc)
+
+    def set(
+        self,
+        key: str,
+        content: bytes,
+        validators: Optional[dict[str, str]] = None,
+        *,
+        encoding: Optional[str] = None,
+    ) -> None:
+        self._remember(key, time.time(), content, encoding)
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._write_atomic(path, gzip.compress(content, compresslevel=6))
+            path.with_suffix(".404").unlink(missing_ok=True)  # gibt es (wieder)
+            meta = path.with_suffix(".json")
+            entry = dict(validators or {})
+            if encoding:
+                entry[_ENCODING_KEY] = encoding
+            if entry:
+                self._write_atomic(meta, json.dumps(entry).encode("utf-8"))
+            else:
+                meta.unlink(missing_ok=True)
+        except OSError as exc:
+            logger.warning("[Cache] Konnte %s nicht schreiben: %s", path, exc)
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            # z. B. Platte voll oder Strg+C: keine verwaisten *.tmp zurücklassen
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+_default_cache: Optional[ResponseCache] = (
+    ResponseCache(os.environ[CACHE_DIR_ENV], refresh=bool(os.environ.get(CACHE_REFRESH_ENV)))
+    if os.environ.get(CACHE_DIR_ENV)
+    else None
+)
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """Prozessweiter Cache; nur aktiv, wenn RIS_LAW_CACHE_DIR gesetzt ist."""
+    return _default_cache
@@ -8,7 +8,9 @@ import os
 import sys
 from pathlib import Path
 
+from .cache import CACHE_DIR_ENV, CACHE_REFRESH_ENV, ResponseCache
 from .exceptions import RisLawError, RisParseError
+from .http_client import HttpClient
 from .ris_api import ENDPOINTS, RisApiClient
 
 logger = logging.getLogger(__name__)
@@ -58,7 +60,12 @@ def main() -> int:
             logger.error(str(exc))
             return 2
 
-    client = RisApiClient(base_url=args.base_url, timeout=args.timeout)
+    http_client = None
+    if args.cache_dir:
+        # eigener Client mit Disk-Cache: Wiederholungen (z. B. nach Abbruch) ohne Netz
+        cache = ResponseCache(args.cache_dir, refresh=bool(os.getenv(CACHE_REFRESH_ENV)))
+        http_client = HttpClient(cache=cache)
+    client = RisApiClient(base_url=args.base_url, timeout=args.timeout, http_client=http_client)
 
     try:
         if args.method == "get":
@@ -98,6 +105,11 @@ def _build_parser() -> argparse.ArgumentParser:
         default=int(os.getenv("RIS_API_TIMEOUT", "30")),
         help="HTTP-Timeout in Sekunden (ENV: RIS_API_TIMEOUT)",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.getenv(CACHE_DIR_ENV),
+        help=f"GET-Antworten in diesem Verzeichnis cachen (ENV: {CACHE_DIR_ENV})",
+    )
     parser.add_argument("--json", action="store_true", help="kompaktes JSON ausgeben")
     parser.add_argument("--plain", action="store_true", help="stabile (nicht eingerückte) Ausgabe")
     parser.add_argument("--raw", action="store_true", help="Antwort als Rohtext ausgeben")
@@ -155,17 +167,16 @@ def _configure_logging(args: argparse.Namespace) -> None:
 def _parse_key_value(items: list[str]) -> dict[str, str | list[str]]:
     params: dict[str, str | list[str]] = {}
     for item in items:
-        if "=" not in item:
+        key, sep, value = item.partition("=")
+        if not sep:
             raise ValueError(f"Ungültiges KEY=VALUE Paar: {item}")
-        key, value = item.split("=", 1)
-        if key in params:
-            existing = params[key]
-            if isinstance(existing, list):
-                existing.append(value)
-            else:
-                params[key] = [existing, value]
-        else:
+        existing = params.get(key)
+        if existing is None:
             params[key] = value
+        elif isinstance(existing, list):
+            existing.append(value)
+        else:
+            params[key] = [existing, value]
     return params
 
 
@@ -0,0 +1,54 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def iter_ordered(
+    executor: Executor,
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    window: int,
+) -> Iterator[R]:
+    """
+    Führt fn(item) auf `executor` aus und liefert die Ergebnisse in
+    Eingabereihenfolge.
+
+    Anders als Executor.map sind höchstens `window` Aufgaben gleichzeitig
+    unterwegs bzw. gepuffert – `items` (z. B. ein Generator) wird nicht vorab
+    leergezogen. Fehler aus fn werden beim Abholen weitergereicht. Hört der
+    Aufrufer vorzeitig auf (break, Fehler, Strg+C), werden noch nicht
+    gestartete Aufgaben verworfen.
+    """
+    window = max(1, window)
+    pending: deque = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+
+def parse_process_pool(workers: int) -> ContextManager[Optional[ProcessPoolExecutor]]:
+    """
+    Prozess-Pool fürs CPU-lastige Parsen; bei workers <= 0 ein nullcontext()
+    (→ None, es wird im Thread geparst).
+
+    Die Worker starten per forkserver (bzw. spawn, wo es den nicht gibt), nicht
+    per fork: Der Pool erzeugt seine Prozesse erst beim ersten submit, wenn
+    Lade- und Writer-Threads schon laufen – fork aus einem Prozess mit Threads
+    kann hängen bleiben (Python 3.12 warnt davor).
+    """
+    if workers <= 0:
+        return nullcontext()
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
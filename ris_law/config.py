@@ -1,21 +1,50 @@
 # ris_law/config.py
 from __future__ import annotations
 import json
+from functools import lru_cache
 from importlib.resources import files
 from typing import Any, Dict, List, Optional
 
 BASE_URL = "https://www.ris.bka.gv.at"
+# §-/Artikel-Seiten (inkl. Inhaltsverzeichnis, Paragraf=0)
+NORMDOKUMENT_URL = f"{BASE_URL}/NormDokument.wxe"
+# kanonische NOR-Dokumente: {BUNDESNORMEN_DOC_BASE}/NOR…/NOR….html
+BUNDESNORMEN_DOC_BASE = f"{BASE_URL}/Dokumente/Bundesnormen"
+LICENSE_NOTE = "Datenquelle: RIS – https://www.ris.bka.gv.at/, Lizenz: CC BY 4.0"
 NS_SOAP = "http://schemas.xmlsoap.org/soap/envelope/"
 NS_SVC = "http://webservice.bka.gv.at/ris/services/RISWebService"
 HEADERS_SOAP = {"Content-Type": "text/xml; charset=utf-8"}
 USER_AGENT = "RISLawClient/1.0"
 REQUEST_TIMEOUT = 20
+# Anzahl paralleler Worker für Voll-Exporte (Requests werden zusätzlich über
+# das `delay`-Intervall gedrosselt, siehe http_client.RateLimiter).
+DEFAULT_MAX_WORKERS = 4
 
 
 def load_laws() -> List[Dict[str, Any]]:
     """Lädt die Gesetze-Liste aus ris_law/data/laws.json."""
+    return list(_laws())
+
+
+@lru_cache(maxsize=1)
+def _laws() -> tuple:
+    """Gelesen und geparst wird die Datei nur einmal pro Prozess."""
     path = files("ris_law.data") / "laws.json"
-    return json.loads(path.read_text(encoding="utf-8"))
+    return tuple(json.loads(path.read_text(encoding="utf-8")))
+
+
+@lru_cache(maxsize=1)
+def _law_index() -> tuple[dict, dict]:
+    """
+    Indizes Gesetzesnummer → (Position, Gesetz) und kurz (lowercase) →
+    (Position, Gesetz); bei Mehrfachnennung zählt jeweils der erste Eintrag.
+    """
+    by_number: Dict[Any, tuple] = {}
+    by_kurz: Dict[str, tuple] = {}
+    for pos, law in enumerate(_laws()):
+        by_number.setdefault(law.get("gesetzesnummer"), (pos, law))
+        by_kurz.setdefault((law.get("kurz") or "").lower(), (pos, law))
+    return by_number, by_kurz
 
 
 def find_law(identifier: str) -> Optional[Dict[str, Any]]:
@@ -23,13 +52,14 @@ def find_law(identifier: str) -> Optional[Dict[str, Any]]:
     Sucht ein Gesetz per Kurzbezeichnung (z.B. 'StGB', case-insensitive)
     ODER per Gesetzesnummer (z.B. '10002296').
     """
-    ident = identifier.strip().lower()
-    for law in load_laws():
-        if law.get("gesetzesnummer") == identifier:
-            return law
-        if law.get("kurz", "").lower() == ident:
-            return law
-    return None
+    by_number, by_kurz = _law_index()
+    hits = [
+        hit
+        for hit in (by_number.get(identifier), by_kurz.get(identifier.strip().lower()))
+        if hit is not None
+    ]
+    # wie die frühere lineare Suche: der in laws.json zuerst stehende Treffer gewinnt
+    return min(hits, key=lambda hit: hit[0])[1] if hits else None
 
 
 def fallback_end_for(gesetzesnummer_or_kurz: str) -> Optional[int]:
@@ -12,3 +12,7 @@ class RisParseError(RisLawError):
 
 class RisSoapError(RisLawError):
     """Raised when SOAP calls fail."""
+
+
+class RisNotFoundError(RisFetchError):
+    """Raised when RIS answers 404 (document does not exist)."""
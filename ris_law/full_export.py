@@ -1,57 +1,121 @@
 from __future__ import annotations
 
-import json
 import logging
-import time
-from typing import Optional, Dict, Any
-from urllib.parse import urlencode
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Optional, Dict, List, Tuple
+from urllib.parse import quote_plus, urlencode
 
-from .html_parser import fetch_paragraph_text_via_html
-from .http_client import HttpClient, get_default_http_client
+from .concurrency import iter_ordered, parse_process_pool
+from .config import DEFAULT_MAX_WORKERS, LICENSE_NOTE, NORMDOKUMENT_URL
+from .html_parser import parse_paragraph
+from .http_client import HttpClient, RateLimiter, get_default_http_client
 from .records import FullRecord
 from .soap_client import get_law_metadata, parse_dates_from_html  # zentrale Datumslogik hier!
+from .toc_parser import get_toc_paragraphs
+from .writer import JsonlWriter
 
-RIS_NORMDOK_BASE = "https://www.ris.bka.gv.at/NormDokument.wxe"
+RIS_NORMDOK_BASE = NORMDOKUMENT_URL
 
 _HTML_HEADERS = {
     "User-Agent": "ris-law/0.1 (+local full_export)",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
 }
 
-license_note = "Datenquelle: RIS – https://www.ris.bka.gv.at/, Lizenz: CC BY 4.0"
+license_note = LICENSE_NOTE
 
 logger = logging.getLogger(__name__)
 
+_RX_BASE_NUMBER = re.compile(r"\s*§?\s*(\d+)")
+# vollständige Einheit "§ 2a" / "2a" → (Basisnummer, Buchstaben-Suffix)
+_RX_UNIT_LABEL = re.compile(r"\s*§?\s*(\d+)\s*([a-zA-Z]*)\s*")
+# Seite ist HTML? – geprüft auf den Roh-Bytes, ohne zu dekodieren
+_RX_HTML_TAG = re.compile(rb"<html", re.IGNORECASE)
+
+# Suffix-Kette "2a", "2b", … ohne chr()/ord() pro Probe
+_SUFFIXES = tuple("abcdefghijklmnopqrstuvwxyz")
+
+
+@lru_cache(maxsize=64)
+def _unit_url_parts(gesetzesnummer: str, key: str) -> tuple[str, str]:
+    """(Präfix, Suffix) der Einheits-URL – konstant pro Gesetz und Einheitstyp."""
+    prefix = urlencode({"Abfrage": "Bundesnormen", "Gesetzesnummer": gesetzesnummer})
+    suffix = urlencode({"Uebergangsrecht": "", "Anlage": ""})
+    return f"{RIS_NORMDOK_BASE}?{prefix}&{key}=", f"&{suffix}"
+
 
 def _unit_url(gesetzesnummer: str, unit_type: str, nr_or_label: int | str) -> str:
     key = "Artikel" if str(unit_type).lower().startswith("art") else "Paragraf"
-    q = {
-        "Abfrage": "Bundesnormen",
-        "Gesetzesnummer": gesetzesnummer,
-        key: str(nr_or_label),
-        "Uebergangsrecht": "",
-        "Anlage": "",
-    }
-    return f"{RIS_NORMDOK_BASE}?{urlencode(q)}"
+    prefix, suffix = _unit_url_parts(gesetzesnummer, key)
+    return f"{prefix}{quote_plus(str(nr_or_label))}{suffix}"
 
 
-def _fetch_unit_html(
-    gesetzesnummer: str,
-    unit_type: str,
-    nr_or_label: int | str,
-    *,
-    client: HttpClient,
-) -> Optional[str]:
-    url = _unit_url(gesetzesnummer, unit_type, nr_or_label)
+def _fetch_unit_html(url: str, *, client: HttpClient) -> Optional[Tuple[bytes, str]]:
+    """(Roh-Bytes, Encoding) der Einheit oder None, wenn es sie nicht gibt."""
     try:
         r = client.get(url, headers=_HTML_HEADERS, timeout=30, min_content_length=100)
-        if "<html" in r.text.lower():
-            return r.text
+        # Prüfung auf den Roh-Bytes – dekodiert wird erst beim Parsen
+        if _RX_HTML_TAG.search(r.content):
+            return r.content, r.encoding or "utf-8"
     except Exception:  # noqa: BLE001
         pass
     return None
 
 
+def _parse_unit_page(content: bytes, encoding: str) -> Tuple[str, str, str, dict]:
+    """
+    (heading, text, nor, Datums-Metadaten) einer Einheitsseite. Modulebene →
+    auch in Worker-Prozessen (ProcessPoolExecutor) nutzbar; übergeben werden
+    nur die Roh-Bytes, dekodiert wird im Worker.
+    """
+    try:
+        heading, text, nor, _ = parse_paragraph(content, encoding)
+    except Exception:  # noqa: BLE001
+        heading = text = nor = ""
+    try:
+        html = content.decode(encoding, "replace")
+    except LookupError:  # unbekannter Zeichensatz im Header → RIS liefert UTF-8
+        html = content.decode("utf-8", "replace")
+    # Einheits-Metadaten: zentral aus soap_client.parse_dates_from_html
+    return heading, text, nor, parse_dates_from_html(html) or {}
+
+
+def _toc_units(
+    gesetzesnummer: str,
+    end_num: int,
+    include_aufgehoben: bool,
+) -> Optional[Dict[int, List[str]]]:
+    """
+    Einheiten laut Inhaltsverzeichnis: Basisnummer → Labels in TOC-Reihenfolge
+    (z. B. 2 → ["2", "2a", "2b"]). None, wenn das TOC nicht geladen werden
+    konnte oder leer ist – dann wird wie bisher jede Nummer samt a..z-Kette geprobt.
+    """
+    try:
+        paragraphs = get_toc_paragraphs(gesetzesnummer, include_aufgehoben)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("[RIS] TOC nicht verfügbar (%s) – probe alle Nummern.", exc)
+        return None
+
+    units: Dict[int, Dict[str, None]] = {}
+    for pid in paragraphs:
+        if pid.isascii() and pid.isdigit():  # Normalfall "17" ohne Regex
+            nr, suffix = int(pid), ""
+        else:
+            m = _RX_UNIT_LABEL.fullmatch(pid)
+            if m:
+                nr, suffix = int(m.group(1)), m.group(2).lower()
+            else:
+                # sonstige Form ("§ 3 bis 5" o. Ä.) → wenigstens die Basisnummer
+                m = _RX_BASE_NUMBER.match(pid)
+                if not m:
+                    continue
+                nr, suffix = int(m.group(1)), ""
+        if nr <= end_num:
+            units.setdefault(nr, {})[f"{nr}{suffix}"] = None
+    return {nr: list(labels) for nr, labels in units.items()} or None
+
+
 def export_full_jsonl(
     *,
     gesetzesnummer: str,
@@ -64,11 +128,20 @@ def export_full_jsonl(
     include_aufgehoben: bool = False,
     laws_json_path: Optional[str] = None,   # nur Signatur-Kompatibilität
     client: HttpClient | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    parse_workers: int = 0,
 ) -> int:
     """
     Voll-Export (start_num..end_num).
-    Pro Basisnummer wird zusätzlich eine Suffix-Schleife (a..z) probiert und
-    beim ersten Loch beendet (typische RIS-Struktur: zusammenhängende Kette).
+    Bei §-Gesetzen bestimmt das Inhaltsverzeichnis, welche Einheiten (inkl.
+    Suffixe wie "2a") geladen werden. Ohne TOC (oder bei Artikeln) wird pro
+    Basisnummer zusätzlich eine Suffix-Schleife (a..z) probiert und beim ersten
+    Loch beendet (typische RIS-Struktur: zusammenhängende Kette).
+
+    Die Basisnummern werden von `max_workers` Threads parallel geladen; `delay`
+    bleibt das Mindestintervall zwischen zwei gestarteten Basisnummern.
+    Mit `parse_workers` > 0 wird das HTML (Text + Datumsangaben) in so vielen
+    Worker-Prozessen geparst; die Threads laden dann nur.
     """
     client = client or get_default_http_client()
     logger.info(
@@ -85,44 +158,54 @@ def export_full_jsonl(
     law_date_out = law_meta.get("date_out_of_force")
     law_pub      = law_meta.get("kundmachungsdatum")
 
-    def _write_unit(nr_or_label: str | int) -> bool:
+    limiter = RateLimiter(delay)
+
+    # Felder, die für alle Datensätze dieses Laufs gleich sind, nur einmal binden
+    make_record = partial(
+        FullRecord,
+        gesetzesnummer=gesetzesnummer,
+        law=law_name,
+        unit_type=unit_type,
+        license=license_note,
+    )
+
+    # pro Lauf konstant: Einheitstyp und Anzeige-Präfix ("Art. 3" / "§ 3")
+    is_art = unit_type.lower().startswith("art")
+    unit_prefix = "Art." if is_art else "§"
+
+    # Für §-Gesetze liefert das TOC die vorhandenen Einheiten samt Suffixen
+    # (der TOC-Parser wertet Paragraf-Links aus): nur diese werden geladen,
+    # ohne Existenz-Probe und ohne a..z-Kette.
+    toc_units = None
+    if not is_art:
+        toc_units = _toc_units(gesetzesnummer, int(end_num), include_aufgehoben)
+
+    def _fetch_unit(nr_or_label: str | int) -> Optional[FullRecord]:
         """
-        Schreibt EINE Einheit. Gibt True zurück, wenn die Einheit existierte und
-        eine Zeile geschrieben wurde; sonst False (z. B. 404/kein HTML).
+        Lädt EINE Einheit. Gibt den Datensatz zurück, wenn die Einheit existierte;
+        sonst None (z. B. 404/kein HTML).
         """
         unit_url = _unit_url(gesetzesnummer, unit_type, nr_or_label)
 
-        # 1) HTML (Existenz + Metadaten)
-        html = _fetch_unit_html(gesetzesnummer, unit_type, nr_or_label, client=client)
-        if not html:
-            return False
-
-        # 2) Text der Einheit (dein bestehender Parser)
-        parsed: Dict[str, Any] = {}
-        try:
-            parsed = fetch_paragraph_text_via_html(unit_url, client=client) or {}
-        except Exception:  # noqa: BLE001
-            parsed = {}
+        # 1) HTML (Existenz + Metadaten) – EIN Request pro Einheit
+        page = _fetch_unit_html(unit_url, client=client)
+        if not page:
+            return None
 
-        text = (parsed.get("text") or "").strip()
-        heading = (parsed.get("heading") or "").strip()
-        nor = (parsed.get("nor") or "").strip()
-
-        # 3) Einheits-Metadaten: zentral aus soap_client.parse_dates_from_html
-        u_meta = parse_dates_from_html(html) or {}
+        # 2) Text + Einheits-Metadaten aus derselben Antwort (kein zweiter Abruf)
+        if parse_pool is None:
+            heading, text, nor, u_meta = _parse_unit_page(*page)
+        else:
+            heading, text, nor, u_meta = parse_pool.submit(_parse_unit_page, *page).result()
         date_in  = u_meta.get("date_in_force")     or law_date_in
         date_out = u_meta.get("date_out_of_force") or law_date_out
         date_pub = u_meta.get("kundmachungsdatum") or law_pub
 
-        record = FullRecord(
-            gesetzesnummer=gesetzesnummer,
-            law=law_name,
-            unit_type=unit_type,
-            unit=f"{'Art.' if unit_type.lower().startswith('art') else '§'} {nr_or_label}",
+        return make_record(
+            unit=f"{unit_prefix} {nr_or_label}",
             unit_number=str(nr_or_label),
             date_in_force=date_in,
             date_out_of_force=date_out,
-            license=license_note,
             status="ok" if text else "resolve_failed",
             text=text,
             heading=heading,
@@ -130,30 +213,67 @@ def export_full_jsonl(
             url=unit_url,
         )
 
-        f.write(json.dumps(record.to_dict(), ensure_ascii=False))
-        f.write("\n")
-        return True
+    def _collect_number(nr: int) -> List[FullRecord]:
+        """
+        Holt eine Basisnummer samt Suffixen (laut TOC, sonst Kette a..z). Läuft im Worker-Thread;
+        geschrieben wird ausschließlich über den JsonlWriter.
+        """
+        if toc_units is not None:
+            labels = toc_units.get(nr)
+            if not labels:
+                return []
+            limiter.acquire()
+            return [record for record in map(_fetch_unit, labels) if record]
+
+        limiter.acquire()
+        records: List[FullRecord] = []
+
+        # Basisnummer
+        record = _fetch_unit(nr)
+        if record:
+            records.append(record)
+
+        # Suffixe a..z
+        nr_str = str(nr)
+        for suffix in _SUFFIXES:
+            record = _fetch_unit(nr_str + suffix)
+            if not record:
+                # Suffix-Kette für diese Basisnummer endet hier
+                break
+            records.append(record)
+        return records
+
+    numbers = range(int(start_num), int(end_num) + 1)
+    if toc_units is not None:
+        # Nummern, die laut TOC fehlen, gar nicht erst an den Pool geben –
+        # sie lieferten ohnehin sofort [] (kein Request)
+        numbers = [nr for nr in numbers if nr in toc_units]
+    total = len(numbers)
+
+    workers = max(1, max_workers)
+
+    def _write(out: JsonlWriter, idx: int, nr: int, records: List[FullRecord]) -> int:
+        for record in records:
+            out.write(record.to_dict())
+        if idx % 50 == 0 or idx == total:
+            logger.info("  ║ Fortschritt: %s/%s", nr, end_num)
+        return len(records)
 
     written = 0
-    with open(out_path, "w", encoding="utf-8") as f:
-        for nr in range(int(start_num), int(end_num) + 1):
-            # Basisnummer
-            if _write_unit(nr):
-                written += 1
-
-            # Suffixe a..z
-            for code in range(ord('a'), ord('z') + 1):
-                label = f"{nr}{chr(code)}"
-                if _write_unit(label):
-                    written += 1
-                else:
-                    # Suffix-Kette für diese Basisnummer endet hier
-                    break
-
-            if delay:
-                time.sleep(delay)
-            if nr % 50 == 0 or nr == end_num:
-                logger.info("  ║ Fortschritt: %s/%s", nr, end_num)
+    # Serialisieren/Schreiben läuft im Writer-Thread, nicht im Sammel-Loop
+    # optionaler Prozess-Pool fürs Parsen (CPU), Threads bleiben fürs Laden (I/O)
+    parse_ctx = parse_process_pool(parse_workers)
+    with parse_ctx as parse_pool, JsonlWriter(out_path) as f, ThreadPoolExecutor(
+        max_workers=workers
+    ) as pool:
+        # Höchstens 2 × workers Basisnummern gleichzeitig unterwegs/gepuffert;
+        # geschrieben wird in Eingabereihenfolge → Ausgabe bleibt sortiert
+        # (nicht an einen Namen binden: bei Abbruch wird der Generator so sofort
+        # geschlossen und verwirft die noch nicht gestarteten Nummern)
+        for idx, (nr, records) in enumerate(
+            zip(numbers, iter_ordered(pool, _collect_number, numbers, 2 * workers)), start=1
+        ):
+            written += _write(f, idx, nr, records)
 
     logger.info("[RIS] ✅ Fertig: %s Einträge gespeichert (%s)", written, law_name)
     return written
@@ -173,6 +293,8 @@ def build_complete_numeric(
     include_aufgehoben: bool = False,
     laws_json_path: Optional[str] = None,
     client: HttpClient | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    parse_workers: int = 0,
 ) -> int:
     return export_full_jsonl(
         gesetzesnummer=gesetzesnummer,
@@ -185,4 +307,6 @@ def build_complete_numeric(
         include_aufgehoben=include_aufgehoben,
         laws_json_path=laws_json_path,
         client=client,
+        max_workers=max_workers,
+        parse_workers=parse_workers,
     )
@@ -1,35 +1,83 @@
 # ris_abgb/html_parser.py
-import re
-from bs4 import BeautifulSoup
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import NamedTuple
 
-from .http_client import HttpClient
+from lxml import etree
+from lxml import html as lxml_html
 
-_RX_NOR = re.compile(r"\b(NOR\d{5,})\b", re.IGNORECASE)
-_RX_NOR_LINK = re.compile(r"/Dokumente/[^/]+/(NOR\d{5,})/(?:\1)\.html", re.IGNORECASE)
+from .cache import NOR_DOCUMENT_TTL
+from .config import BUNDESNORMEN_DOC_BASE
+from .http_client import HttpClient, get_default_http_client
+from .lxml_util import node_text
+from .patterns import RX_NOR_B, RX_PARA_ID, may_contain_nor
+
+_NOR_DOCUMENT_PREFIX = f"{BUNDESNORMEN_DOC_BASE}/"
 
 def _get_with_retry(url: str, tries: int = 3, timeout: int = 120, client: HttpClient | None = None):
-    client = client or HttpClient(retries=tries)
-    return client.get(url, timeout=timeout, allow_redirects=True, min_content_length=500)
+    if client is None:
+        # gemeinsamer Verbindungspool (Keep-Alive) statt einer neuen Session pro Aufruf;
+        # nur ein abweichendes `tries` braucht einen eigenen Client
+        client = get_default_http_client()
+        if client.retries != tries:
+            client = HttpClient(retries=tries)
+    # NOR-Dokumente ändern sich nie → im Cache ohne Ablauf; §-Seiten mit Standard-TTL
+    cache_ttl = NOR_DOCUMENT_TTL if url.startswith(_NOR_DOCUMENT_PREFIX) else None
+    return client.get(
+        url, timeout=timeout, allow_redirects=True, min_content_length=500, cache_ttl=cache_ttl
+    )
+
+def _class_xp(cls: str) -> str:
+    """XPath-Prädikat für CSS-Klassen-Selektoren (".cls")."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+# Navigations-/Meta-Bereiche (plus script/style, die nie Normtext enthalten)
+# in EINEM XPath-Durchlauf statt eines select() pro Selektor.
+_NAV_TAGS = ("header", "nav", "footer", "script", "style")
+_NAV_IDS = ("menu", "header", "footer", "druck", "print")
+_NAV_CLASSES = ("menu", "breadcrumb", "nav", "breadcrumbs", "footer", "header", "druck", "druckansicht")
+_XP_NAV = etree.XPath(
+    "//*["
+    + " or ".join(
+        [f"self::{t}" for t in _NAV_TAGS]
+        + [f"@id='{i}'" for i in _NAV_IDS]
+        + [_class_xp(c) for c in _NAV_CLASSES]
+    )
+    + "]"
+)
+
+# Kandidaten für den Normtext – Reihenfolge = Priorität (wie früher select_one)
+_XP_CANDIDATES = [
+    etree.XPath(f"(//div[@id='content']//div[{_class_xp('norm')}])[1]"),
+    etree.XPath(f"(//div[@id='content']//div[{_class_xp('dokument')}])[1]"),
+    etree.XPath("(//div[@id='content'])[1]"),
+    etree.XPath(f"(//div[{_class_xp('content')}])[1]"),
+    etree.XPath("(//article)[1]"),
+    etree.XPath("(//main)[1]"),
+    etree.XPath("(//body)[1]"),
+]
+_XP_HEADING = etree.XPath("(.//*[self::h1 or self::h2 or self::h3])[1]")
+
 
-def _strip_obvious_nav(soup: BeautifulSoup):
+def _strip_obvious_nav(tree) -> None:
     # Navigations-/Meta-Bereiche entfernen, wenn vorhanden
-    for sel in [
-        "header", "nav", "footer",
-        "#menu", ".menu", ".breadcrumb", ".nav", ".breadcrumbs",
-        "#header", "#footer", ".footer", ".header",
-        ".druck", ".druckansicht", "#druck", "#print"
-    ]:
-        for n in soup.select(sel):
-            n.decompose()
-
-def _extract_nors_from_html(html: str) -> list[str]:
-    """Extrahiert alle NOR-IDs, die im Text vorkommen oder als Dokument-Links eingebunden sind."""
-    nors = set()
-    for m in _RX_NOR.finditer(html):
-        nors.add(m.group(1))
-    for m in _RX_NOR_LINK.finditer(html):
-        nors.add(m.group(1))
-    return sorted(nors)
+    for n in _XP_NAV(tree):
+        if n.getparent() is not None:
+            n.drop_tree()
+
+
+def _extract_nors_from_html(content: bytes) -> list[str]:
+    """
+    Extrahiert alle NOR-IDs, die im Text vorkommen oder als Dokument-Links
+    eingebunden sind. Arbeitet auf den Roh-Bytes, ohne die Seite zu dekodieren.
+    """
+    if not may_contain_nor(content):
+        return []  # Seite ohne "NOR" → kein Regex-Durchlauf
+    # EIN Durchlauf genügt: jeder Dokument-Link /Dokumente/…/NOR…/NOR….html
+    # enthält die NOR zwischen zwei "/" – also immer auch als freies Wort,
+    # das RX_NOR_B findet. Dekodiert wird nur jede NOR einmal.
+    return sorted(nor.decode("ascii") for nor in set(RX_NOR_B.findall(content)))
 
 def resolve_nor_urls_from_toc_url(toc_url: str, *, client: HttpClient | None = None) -> list[str]:
     """
@@ -37,18 +85,77 @@ def resolve_nor_urls_from_toc_url(toc_url: str, *, client: HttpClient | None = N
     alle dazugehörigen *kanonischen* NOR-HTML-URLs.
     Falls nichts gefunden wird, wird die Eingabe-URL als Fallback zurückgegeben.
     """
-    r = _get_with_retry(toc_url, client=client)
-    html = r.text
-    nors = _extract_nors_from_html(html)
-    if not nors:
-        m = _RX_NOR.search(html)
-        if m:
-            nors = [m.group(1)]
+    with _resolved_lock:
+        urls = _resolved.get(toc_url)
+        if urls is not None:
+            _resolved.move_to_end(toc_url)
+            return list(urls)
+    urls = _resolve_nor_urls(toc_url, client)  # Fehler werden nicht gecacht
+    with _resolved_lock:
+        _resolved[toc_url] = urls
+        _resolved.move_to_end(toc_url)
+        while len(_resolved) > _RESOLVE_CACHE_SIZE:
+            _resolved.popitem(last=False)
+    return list(urls)
+
+
+# groß genug für das komplette TOC auch der längsten Gesetze (ABGB: > 1500 §§),
+# damit ein zweiter Durchlauf nicht vorne schon wieder verdrängt wurde
+_RESOLVE_CACHE_SIZE = 4096
+
+# Memo nur über die URL: das Ergebnis hängt nicht vom Client ab, und so hält
+# der Cache keine Clients (samt Sessions und Verbindungspools) am Leben
+_resolved: OrderedDict[str, tuple[str, ...]] = OrderedDict()
+_resolved_lock = threading.Lock()
+
+
+def _resolve_nor_urls(toc_url: str, client: HttpClient | None) -> tuple[str, ...]:
+    nors = _extract_nors_from_html(fetch_html(toc_url, client=client))
     if not nors:
-        return [toc_url]  # Fallback: wenigstens diese Seite verarbeiten
+        return (toc_url,)  # Fallback: wenigstens diese Seite verarbeiten
+
+    return tuple(f"{BUNDESNORMEN_DOC_BASE}/{nor}/{nor}.html" for nor in nors)
+
+def fetch_html(url: str, *, client: HttpClient | None = None) -> bytes:
+    """Lädt eine RIS-Seite roh (ohne Parsen) – z. B. für reine NOR-Scans."""
+    return _get_with_retry(url, client=client).content
+
+def fetch_page(url: str, *, client: HttpClient | None = None) -> tuple[bytes, str]:
+    """Lädt eine Seite roh samt Encoding – geparst wird getrennt (parse_html)."""
+    r = _get_with_retry(url, client=client)
+    return r.content, r.encoding or "utf-8"
+
+def parse_html(content: bytes, encoding: str = "utf-8") -> dict:
+    """Parst eine bereits geladene Seite zu {"heading", "text", "nor"}."""
+    heading, text, nor = _parse_paragraph_html(content, encoding)
+    return {"heading": heading, "text": text, "nor": nor}
 
-    base = "https://www.ris.bka.gv.at/Dokumente/Bundesnormen"
-    return [f"{base}/{nor}/{nor}.html" for nor in nors]
+class ParsedParagraph(NamedTuple):
+    """Felder einer Paragraph-Seite, bereits getrimmt, samt §-ID."""
+
+    heading: str
+    text: str
+    nor: str
+    para_id: str
+
+
+_EMPTY_PARAGRAPH = ParsedParagraph("", "", "", "")
+
+
+def parse_paragraph(content: bytes, encoding: str = "utf-8") -> ParsedParagraph:
+    """
+    Wie parse_html, liefert aber direkt die Felder für Export-Datensätze.
+    Modulebene → auch in Worker-Prozessen (ProcessPoolExecutor) nutzbar.
+    """
+    # node_text setzt nur getrimmte Stücke zusammen – kein weiteres strip() nötig
+    heading, text, nor = _parse_paragraph_html(content, encoding)
+    return ParsedParagraph(heading, text, nor, extract_para_id(heading or text))
+
+def fetch_paragraph(url: str, *, client: HttpClient | None = None) -> ParsedParagraph:
+    """Lädt eine (NOR- oder §-)HTML-Seite und liefert ParsedParagraph."""
+    if not url:
+        return _EMPTY_PARAGRAPH
+    return parse_paragraph(*fetch_page(url, client=client))
 
 def fetch_paragraph_text_via_html(url: str, *, client: HttpClient | None = None) -> dict:
     """
@@ -57,38 +164,64 @@ def fetch_paragraph_text_via_html(url: str, *, client: HttpClient | None = None)
     if not url:
         return {"heading": "", "text": "", "nor": ""}
 
-    r = _get_with_retry(url, client=client)
-    html = r.text
-    soup = BeautifulSoup(html, "html.parser")
-    _strip_obvious_nav(soup)
-
-    m = _RX_NOR.search(html)
-    nor = m.group(1) if m else ""
-
-    candidates = [
-        soup.select_one("div#content div.norm"),
-        soup.select_one("div#content div.dokument"),
-        soup.select_one("div#content"),
-        soup.select_one("div.content"),
-        soup.select_one("article"),
-        soup.select_one("main"),
-        soup.body,
-    ]
-
-    for cand in candidates:
-        if not cand:
+    return parse_html(*fetch_page(url, client=client))
+
+
+def _parse_paragraph_html(content: bytes, encoding: str) -> tuple[str, str, str]:
+    """Parst eine Paragraph-Seite zu (heading, text, nor)."""
+    tree = lxml_html.document_fromstring(
+        content, parser=lxml_html.HTMLParser(encoding=encoding)
+    )
+    _strip_obvious_nav(tree)
+
+    m = RX_NOR_B.search(content) if may_contain_nor(content) else None
+    nor = m.group(1).decode("ascii") if m else ""
+
+    texts = {}  # bereits extrahierte Knotentexte, für den Dokument-Fallback
+    for xp in _XP_CANDIDATES:
+        found = xp(tree)
+        if not found:
             continue
-        h = cand.find(["h1", "h2", "h3"])
-        heading = h.get_text(strip=True) if h else ""
-        text = cand.get_text("\n", strip=True)
-        if text and len(text) >= 50:
-            return {"heading": heading, "text": text, "nor": nor}
+        cand = found[0]
+        if cand in texts:
+            continue  # derselbe Knoten wie ein früherer, schon verworfener Kandidat
+        text = texts[cand] = node_text(cand, "\n")
+        if len(text) >= 50:
+            # Überschrift nur für den gewählten Kandidaten suchen
+            h = _XP_HEADING(cand)
+            return (node_text(h[0], "") if h else ""), text, nor
+
+    # Dokumenttext = Wurzeltext + Text/Tail jedes Kindes; den <body>-Text
+    # hat der letzte Kandidat schon geliefert, er wird nicht erneut gesammelt.
+    parts = [(tree.text or "").strip()]
+    for child in tree:
+        if isinstance(child.tag, str):  # Kommentare/PIs tragen keinen Text bei
+            child_text = texts.get(child)
+            parts.append(node_text(child, "\n") if child_text is None else child_text)
+        parts.append((child.tail or "").strip())
+    full = "\n".join(p for p in parts if p)
+    return "", full or "", nor
+
+# Überschriften sind kurz und wiederholen sich – nur solche Strings memoisieren,
+# lange Fließtexte würden den Cache bloß mit Einzelstücken füllen
+_PARA_ID_MEMO_MAX_LEN = 128
 
-    full = soup.get_text("\n", strip=True)
-    if full and len(full) >= 50:
-        return {"heading": "", "text": full, "nor": nor}
-    return {"heading": "", "text": full or "", "nor": nor}
 
 def extract_para_id(s: str) -> str:
-    m = re.search(r"(§+\s*\d+[a-zA-Z]*)", s or "")
-    return m.group(1).strip() if m else ""
\ No newline at end of file
+    if not s:
+        return ""
+    if len(s) <= _PARA_ID_MEMO_MAX_LEN:
+        return _extract_para_id_memo(s)
+    return _extract_para_id(s)
+
+
+def _extract_para_id(s: str) -> str:
+    # Ohne "§" kann das Muster nie treffen; sonst erst ab dem ersten "§" suchen
+    pos = s.find("§")
+    if pos < 0:
+        return ""
+    m = RX_PARA_ID.search(s, pos)
+    return m.group(1).strip() if m else ""
+
+
+_extract_para_id_memo = lru_cache(maxsize=8192)(_extract_para_id)
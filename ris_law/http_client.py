@@ -1,16 +1,26 @@
 from __future__ import annotations
 
 import logging
+import random
+import threading
 import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import partial
 from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from .cache import ResponseCache, get_default_cache
 from .config import REQUEST_TIMEOUT, USER_AGENT
-from .exceptions import RisFetchError
+from .exceptions import RisFetchError, RisNotFoundError
 
 logger = logging.getLogger(__name__)
 
+# Status-Codes, bei denen sich ein erneuter Versuch lohnt (Drosselung/Serverfehler)
+_RETRY_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
 
 class HttpClient:
     def __init__(
@@ -20,12 +30,26 @@ class HttpClient:
         timeout: int = REQUEST_TIMEOUT,
         retries: int = 3,
         backoff: float = 1.5,
+        pool_maxsize: int = 32,
+        pool_block: bool = True,
+        max_backoff: float = 60.0,
+        cache: ResponseCache | None = None,
     ) -> None:
         self.session = requests.Session()
-        self.headers = {"User-Agent": user_agent}
+        self.headers = {"User-Agent": user_agent, "Accept-Encoding": "gzip, deflate"}
+        # Standard-Header einmal an der Session setzen; Keep-Alive-Pool groß genug
+        # für parallele Worker, damit Verbindungen zu ris.bka.gv.at wiederverwendet werden.
+        # pool_block: mehr Threads als pool_maxsize warten auf eine freie Verbindung,
+        # statt Wegwerf-Verbindungen (je eigener TLS-Handshake) aufzubauen.
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.timeout = timeout
         self.retries = retries
         self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache = cache
 
     def get(
         self,
@@ -36,39 +60,50 @@ class HttpClient:
         timeout: Optional[int] = None,
         allow_redirects: bool = True,
         min_content_length: Optional[int] = None,
+        cache_ttl: Optional[float] = None,
     ) -> requests.Response:
-        last_error: Exception | None = None
-        for attempt in range(1, self.retries + 1):
-            try:
-                merged_headers = dict(self.headers)
-                if headers:
-                    merged_headers.update(headers)
-                response = self.session.get(
-                    url,
-                    headers=merged_headers,
-                    params=params,
-                    timeout=timeout or self.timeout,
-                    allow_redirects=allow_redirects,
-                )
-                response.raise_for_status()
-                if min_content_length is not None:
-                    if not response.text or len(response.text) < min_content_length:
-                        raise ValueError("Response body too short")
-                return response
-            except Exception as exc:  # noqa: BLE001
-                last_error = exc
-                logger.warning(
-                    "HTTP GET failed (%s/%s) for %s: %s",
-                    attempt,
-                    self.retries,
-                    url,
-                    exc,
-                )
-                if attempt < self.retries:
-                    time.sleep(self.backoff * attempt)
-        if last_error:
-            raise RisFetchError(str(last_error)) from last_error
-        raise RisFetchError("HTTP request failed without an exception")
+        cache_key = None
+        conditional: dict[str, str] = {}
+        if self.cache is not None:
+            cache_key = requests.Request("GET", url, params=params).prepare().url
+            if self.cache.is_not_found(cache_key):
+                raise RisNotFoundError(f"404 Not Found (Cache): {cache_key}")
+            content = self.cache.get(cache_key, ttl=cache_ttl)
+            if content is None:
+                # abgelaufener Eintrag mit ETag/Last-Modified → bedingt anfragen
+                conditional = self.cache.validators(cache_key)
+            elif len(content) >= (min_content_length or 0):
+                return _cached_response(cache_key, content, self.cache.encoding(cache_key))
+
+        send = partial(
+            self._send,
+            "GET",
+            url,
+            params=params,
+            timeout=timeout or self.timeout,
+            allow_redirects=allow_redirects,
+            min_content_length=min_content_length,
+        )
+        try:
+            if conditional:
+                response = send(headers={**(headers or {}), **conditional})
+                if response.status_code == 304:
+                    content = self.cache.revalidate(cache_key)
+                    if content is not None:
+                        return _cached_response(cache_key, content, self.cache.encoding(cache_key))
+                    response = send(headers=headers)  # Eintrag inzwischen verschwunden
+            else:
+                response = send(headers=headers)
+        except RisNotFoundError:
+            if cache_key is not None:
+                self.cache.set_not_found(cache_key)
+            raise
+        if cache_key is not None and response.status_code == 200:
+            # nur vollständige Antworten cachen (keine 206-Teilinhalte)
+            self.cache.set(
+                cache_key, response.content, _validators(response), encoding=response.encoding
+            )
+        return response
 
     def post(
         self,
@@ -77,39 +112,163 @@ class HttpClient:
         headers: Optional[dict[str, str]] = None,
         data: Optional[bytes] = None,
         timeout: Optional[int] = None,
+    ) -> requests.Response:
+        return self._send(
+            "POST",
+            url,
+            headers=headers,
+            data=data,
+            timeout=timeout or self.timeout,
+        )
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        *,
+        min_content_length: Optional[int] = None,
+        **kwargs,
     ) -> requests.Response:
         last_error: Exception | None = None
         for attempt in range(1, self.retries + 1):
+            response: requests.Response | None = None
             try:
-                merged_headers = dict(self.headers)
-                if headers:
-                    merged_headers.update(headers)
-                response = self.session.post(
-                    url,
-                    headers=merged_headers,
-                    data=data,
-                    timeout=timeout or self.timeout,
-                )
+                response = self.session.request(method, url, **kwargs)
+                if response.status_code == 404:
+                    # eindeutig "existiert nicht" – kein erneuter Versuch
+                    raise RisNotFoundError(f"404 Not Found: {url}")
                 response.raise_for_status()
+                if response.status_code == 304:
+                    return response  # bedingte Anfrage: Inhalt liegt im Cache
+                if min_content_length is not None and _too_short(response, min_content_length):
+                    raise ValueError("Response body too short")
                 return response
+            except RisNotFoundError:
+                raise
             except Exception as exc:  # noqa: BLE001
                 last_error = exc
                 logger.warning(
-                    "HTTP POST failed (%s/%s) for %s: %s",
+                    "HTTP %s failed (%s/%s) for %s: %s",
+                    method,
                     attempt,
                     self.retries,
                     url,
                     exc,
                 )
+                status = response.status_code if response is not None else None
+                if status and 400 <= status < 500 and status not in _RETRY_STATUS:
+                    break  # Client-Fehler: ein weiterer Versuch ändert nichts
                 if attempt < self.retries:
-                    time.sleep(self.backoff * attempt)
+                    time.sleep(self._retry_delay(attempt, response))
         if last_error:
             raise RisFetchError(str(last_error)) from last_error
         raise RisFetchError("HTTP request failed without an exception")
 
+    def _retry_delay(self, attempt: int, response: requests.Response | None) -> float:
+        """
+        Wartezeit vor dem nächsten Versuch: bei 429/503 zählt ein Retry-After
+        des Servers (Sekunden oder HTTP-Datum), sonst exponentielles Back-off
+        mit Jitter.
+        """
+        if response is not None:
+            retry_after = _parse_retry_after(response.headers.get("Retry-After") or "")
+            if retry_after is not None:
+                return min(self.max_backoff, retry_after)
+        return min(self.max_backoff, self.backoff * 2 ** (attempt - 1)) + random.random()
+
+
+def _parse_retry_after(value: str) -> Optional[float]:
+    """
+    Retry-After in Sekunden – als Zahl ("120") oder HTTP-Datum
+    ("Wed, 21 Oct 2026 07:28:00 GMT", RFC 9110); None, wenn unbrauchbar.
+    """
+    value = value.strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+    if when.tzinfo is None:  # "-0000" → ohne Zeitzone, gemeint ist UTC
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _too_short(response: requests.Response, min_chars: int) -> bool:
+    """
+    Weniger als `min_chars` Zeichen Text? Entscheidet meist schon über die
+    Byte-Länge (Zeichen ≤ Bytes ≤ 4 × Zeichen) – nur im Grenzbereich wird
+    der Body dekodiert, statt jede (ggf. MB-große) Seite als zweite Kopie.
+    """
+    size = len(response.content)
+    if not size or size < min_chars:
+        return True
+    return size < 4 * min_chars and len(response.text) < min_chars
+
+
+def _validators(response: requests.Response) -> dict[str, str]:
+    """Header für spätere bedingte Anfragen aus ETag/Last-Modified."""
+    validators = {}
+    etag = response.headers.get("ETag")
+    if etag:
+        validators["If-None-Match"] = etag
+    last_modified = response.headers.get("Last-Modified")
+    if last_modified:
+        validators["If-Modified-Since"] = last_modified
+    return validators
+
+
+def _cached_response(url: str, content: bytes, encoding: Optional[str]) -> requests.Response:
+    """
+    Baut eine Response aus einem Cache-Eintrag, mit dem Encoding der
+    ursprünglichen Antwort (ältere Einträge ohne: UTF-8, wie RIS liefert).
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = content
+    response.encoding = encoding or "utf-8"
+    return response
+
+
+class RateLimiter:
+    """
+    Thread-sicherer Taktgeber: Es startet höchstens ein Request pro `interval`
+    Sekunden – unabhängig davon, wie viele Worker parallel laufen.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = max(0.0, interval or 0.0)
+        self._lock = threading.Lock()
+        self._next_allowed = 0.0
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_allowed - now
+            self._next_allowed = max(now, self._next_allowed) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
 
-_default_client = HttpClient()
+_default_client: HttpClient | None = None
+_default_client_lock = threading.Lock()
 
 
 def get_default_http_client() -> HttpClient:
-    return _default_client
+    """
+    Prozessweiter Client (eine Session, ein Verbindungspool). Wird erst beim
+    ersten Zugriff erzeugt – auch wenn mehrere Worker-Threads gleichzeitig fragen.
+    """
+    global _default_client
+    client = _default_client
+    if client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = HttpClient(cache=get_default_cache())
+            client = _default_client
+    return client
@@ -1,13 +1,35 @@
-import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib import parse as urlparse
-import requests
-from bs4 import BeautifulSoup
-from config import BASE
+
+from lxml import html as lxml_html
+
+from .concurrency import iter_ordered
+from .config import BASE_URL, DEFAULT_MAX_WORKERS
+from .exceptions import RisFetchError, RisNotFoundError
+from .http_client import HttpClient, RateLimiter, get_default_http_client
+
+
+# Für die Existenzprüfung reicht der Seitenkopf bis zur ersten Überschrift
+_PROBE_LIMIT = 64 * 1024
+_PROBE_HEADERS = {"Range": f"bytes=0-{_PROBE_LIMIT - 1}"}
+
+
+def _page_head(content: bytes) -> bytes:
+    """Schneidet die Seite nach dem ersten </h1> (bzw. nach _PROBE_LIMIT) ab."""
+    end = content.find(b"</h1>", 0, _PROBE_LIMIT)
+    return content[: end + 5] if end >= 0 else content[:_PROBE_LIMIT]
+
+
+def _heading_text(head: bytes, encoding: str) -> str | None:
+    """Text der ersten <h1> im Seitenkopf (lxml statt BeautifulSoup)."""
+    tree = lxml_html.document_fromstring(head, parser=lxml_html.HTMLParser(encoding=encoding))
+    h1 = tree.find(".//h1")
+    return "".join(h1.itertext()).strip() if h1 is not None else None
 
 
 def _par_url(gesetzesnummer: str, par: str) -> str:
     return (
-        f"{BASE}/NormDokument.wxe"
+        f"{BASE_URL}/NormDokument.wxe"
         f"?Abfrage=Bundesnormen&Gesetzesnummer={gesetzesnummer}&Paragraf={urlparse.quote(par)}"
     )
 
@@ -18,39 +40,95 @@ def fetch_abgb_index_docrefs(
     max_par: int = 1502,
     pause: float = 0.25,
     consecutive_miss_limit: int = 150,
+    client: HttpClient | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
 ):
     """
     Holt Dokument-Referenzen über direkte Paragraph-Abfrage (Fallback-Modus).
     """
-    docrefs = []
-    consecutive_misses = 0
+    return list(
+        iter_abgb_index_docrefs(
+            gesetzesnummer,
+            start_par=start_par,
+            max_par=max_par,
+            pause=pause,
+            consecutive_miss_limit=consecutive_miss_limit,
+            client=client,
+            max_workers=max_workers,
+        )
+    )
+
+
+_MISS = object()  # Probe ohne Treffer (404 / kein RIS-Dokument)
+
 
-    for n in range(start_par, max_par + 1):
+def iter_abgb_index_docrefs(
+    gesetzesnummer: str = "10001622",
+    start_par: int = 1,
+    max_par: int = 1502,
+    pause: float = 0.25,
+    consecutive_miss_limit: int = 150,
+    client: HttpClient | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+):
+    """
+    Wie fetch_abgb_index_docrefs, liefert die Referenzen aber sofort beim
+    Auffinden (Generator) – Aufrufer können schon schreiben, während noch
+    weiter geprobt wird.
+
+    Die Paragraphen werden von `max_workers` Threads geprobt; `pause` bleibt
+    der Mindestabstand zwischen zwei Request-Starts (über alle Threads).
+    Ausgewertet wird in Paragraph-Reihenfolge, auch für den Fehltreffer-Abbruch.
+    """
+    client = client or get_default_http_client()
+    # `pause` = Mindestabstand zwischen zwei Request-Starts; geschlafen wird nur,
+    # wenn der letzte Request schneller war
+    limiter = RateLimiter(pause)
+
+    def _probe(n: int):
+        """DocRef, _MISS (kein Treffer) oder None (Fehler → übersprungen)."""
         url = _par_url(gesetzesnummer, str(n))
         print(f"Prüfe § {n} …")
+        limiter.acquire()
 
-        resp = requests.get(url)
-        if resp.status_code != 200 or "RIS" not in resp.text:
-            consecutive_misses += 1
-            if consecutive_misses > consecutive_miss_limit:
-                print("Abbruch wegen zu vieler fehlender Treffer.")
-                break
-            continue
-
-        soup = BeautifulSoup(resp.text, "lxml")
-        heading = soup.find("h1")
-        heading_text = heading.text.strip() if heading else None
-
-        docrefs.append(
-            type("DocRef", (), {
-                "url": url,
-                "heading": heading_text,
-                "paragraph_id": f"§ {n}",
-                "nor": None,
-            })()
-        )
+        # gemeinsame Session (Keep-Alive); 429/5xx werden im Client mit Back-off
+        # wiederholt, nur ein echtes 404 zählt als "Paragraph existiert nicht".
+        try:
+            # Range-Request: unterstützt der Server ihn, kommt nur der Seitenkopf
+            # (206); sonst die ganze Seite, von der nur der Kopf geparst wird.
+            r = client.get(url, headers=_PROBE_HEADERS)
+            head, encoding = _page_head(r.content), r.encoding or "utf-8"
+        except RisNotFoundError:
+            return _MISS
+        except RisFetchError as exc:
+            print(f"Fehler bei § {n}: {exc} – übersprungen.")
+            return None
 
-        consecutive_misses = 0
-        time.sleep(pause)
+        if b"RIS" not in head:
+            return _MISS
+
+        return type("DocRef", (), {
+            "url": url,
+            "heading": _heading_text(head, encoding),
+            "paragraph_id": f"§ {n}",
+            "nor": None,
+        })()
+
+    consecutive_misses = 0
+    workers = max(1, max_workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Höchstens 2 × workers Proben gleichzeitig unterwegs; ausgewertet wird
+        # in Paragraph-Reihenfolge. Abbruch (Fehltreffer-Limit, Strg+C, Aufrufer
+        # hört auf) verwirft die noch nicht gestarteten Proben.
+        for ref in iter_ordered(pool, _probe, range(start_par, max_par + 1), 2 * workers):
+            if ref is None:
+                continue
+            if ref is _MISS:
+                consecutive_misses += 1
+                if consecutive_misses > consecutive_miss_limit:
+                    print("Abbruch wegen zu vieler fehlender Treffer.")
+                    break
+                continue
 
-    return docrefs
+            yield ref
+            consecutive_misses = 0
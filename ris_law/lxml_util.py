@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from lxml import etree
+from lxml import html as lxml_html
+
+
+def parse_html_document(html: str | bytes, encoding: Optional[str] = None):
+    """
+    lxml-Dokumentbaum einer RIS-Seite; None bei leerem/unparsebarem Dokument.
+
+    Bytes werden mit `encoding` (sonst Erkennung durch libxml2) geparst.
+    Ein str mit XML-Encoding-Deklaration (<?xml … encoding=…?>) lehnt lxml
+    ab – er wird dann als UTF-8-Bytes geparst, wie es bs4 stillschweigend tat.
+    """
+    try:
+        if isinstance(html, bytes):
+            parser = lxml_html.HTMLParser(encoding=encoding) if encoding else None
+            return lxml_html.document_fromstring(html, parser=parser)
+        try:
+            return lxml_html.document_fromstring(html)
+        except ValueError:
+            return lxml_html.document_fromstring(
+                html.encode("utf-8"), parser=lxml_html.HTMLParser(encoding="utf-8")
+            )
+    except etree.ParserError:
+        return None
+
+
+# Elemente ohne sichtbaren Text (bs4 get_text() lässt sie aus)
+_NON_TEXT_TAGS = ("script", "style")
+_XP_VISIBLE_TEXT = etree.XPath(
+    ".//text()[not(parent::script or parent::style)]", smart_strings=False
+)
+
+
+def node_text(node, sep: str = " ") -> str:
+    """
+    Entspricht BeautifulSoup get_text(sep, strip=True): die getrimmten,
+    nicht-leeren Textstücke des Teilbaums (ohne script/style), mit `sep`
+    verbunden. Ohne script/style im Teilbaum – dem Normalfall – genügt
+    itertext(), das deutlich schneller ist als die XPath-Abfrage.
+    """
+    if next(node.iter(*_NON_TEXT_TAGS), None) is None:
+        texts = node.itertext()
+    else:
+        texts = _XP_VISIBLE_TEXT(node)
+    return sep.join(t for t in (s.strip() for s in texts) if t)
@@ -0,0 +1,24 @@
+"""
+Gemeinsame, einmalig kompilierte Muster für RIS-Dokumentnummern und §-IDs.
+"""
+import re
+
+# NOR-Dokumentnummer, z. B. NOR12019837
+RX_NOR = re.compile(r"\b(NOR\d{5,})\b", re.IGNORECASE)
+
+# Bytes-Varianten für den Scan direkt auf response.content (ohne Dekodieren);
+# NOR-Nummern sind reines ASCII und damit in jeder RIS-Kodierung gleich.
+RX_NOR_B = re.compile(rb"\b(NOR\d{5,})\b", re.IGNORECASE)
+
+# Paragraph-ID im Überschriften-/Fließtext, z. B. "§ 1", "§§ 17a"
+RX_PARA_ID = re.compile(r"(§+\s*\d+[a-zA-Z]*)")
+
+
+def may_contain_nor(content: bytes) -> bool:
+    """
+    Schneller Vorfilter vor RX_NOR_B: reine Teilstring-Suche (C, memchr-artig)
+    statt Regex-Durchlauf. False → RX_NOR_B kann garantiert nicht treffen.
+    RX_NOR_B ignoriert Groß/Klein (nur ASCII) – daher im Zweifel auf einer
+    klein geschriebenen Kopie suchen; der Normalfall "NOR" trifft vorher.
+    """
+    return b"NOR" in content or b"nor" in content.lower()
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
 from typing import Optional
 
 
@@ -19,7 +19,8 @@ class TocRecord:
     text: Optional[str]
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        # nur flache Felder → Kopie von __dict__ (Feldreihenfolge) statt asdict()-Deep-Copy
+        return dict(self.__dict__)
 
 
 @dataclass(frozen=True)
@@ -39,4 +40,5 @@ class FullRecord:
     url: str
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        # nur flache Felder → Kopie von __dict__ (Feldreihenfolge) statt asdict()-Deep-Copy
+        return dict(self.__dict__)
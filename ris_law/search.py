@@ -1,41 +1,67 @@
-from typing import List, Dict
+import logging
+from typing import List, Dict, Optional
 from lxml import etree
-from .config import NS_SVC
+from .config import BUNDESNORMEN_DOC_BASE, NS_SVC
 from .soap_client import post_soap, soap_envelope, result_embedded_xml
 
+logger = logging.getLogger(__name__)
+
+# Namensraum-unabhängig wie zuvor local-name(), aber vorkompiliert bzw. als
+# C-seitiger Tag-Vergleich über iter("{*}…") statt String-Vergleich pro Element
+_TAG_DOC_REF = "{*}OgdDocumentReference"
+_TAG_ID = "{*}ID"
+_XP_TECH_ID = etree.XPath(".//*[local-name()='Technisch']/*[local-name()='ID']")
+
+# feste Teile der SearchDocuments-Anfrage (UTF-8-Bytes); variabel sind nur
+# Gesetzesnummer und Seite
+_SEARCH_HEAD = (
+    f'<SearchDocuments xmlns="{NS_SVC}">'
+    f'  <query xmlns="{NS_SVC}">'
+    "<Suche>"
+    "  <Bundesrecht>"
+    "    <BrKons>"
+    "      <Gesetzesnummer>"
+).encode("utf-8")
+_SEARCH_MID = (
+    "</Gesetzesnummer>"
+    "    </BrKons>"
+    "  </Bundesrecht>"
+    "</Suche>"
+    "</query>"
+).encode("utf-8")
+_SEARCH_TAIL = b"</SearchDocuments>"
+
+def _search_result(gesetzesnummer: str, page: int, page_size: int) -> Optional[etree._Element]:
+    """SOAP-Suche; liefert das SearchDocumentsResult-Element (oder None)."""
+    body = b"".join((
+        _SEARCH_HEAD,
+        gesetzesnummer.encode("utf-8"),
+        _SEARCH_MID,
+        f"  <pageNumber>{page}</pageNumber>  <pageSize>{page_size}</pageSize>".encode("ascii"),
+        _SEARCH_TAIL,
+    ))
+    root = post_soap(f"{NS_SVC}/SearchDocuments", soap_envelope(body))
+    # Debug-Abzüge nur im Debug-Modus – sonst kein Re-Serialisieren des Baums
+    # und keine Dateischreibzugriffe pro Suchseite
+    if logger.isEnabledFor(logging.DEBUG):
+        try:
+            with open("last_search_envelope.xml", "wb") as dbg:
+                dbg.write(etree.tostring(root, encoding="utf-8"))
+        except OSError:
+            pass
+    return root.find(f".//{{{NS_SVC}}}SearchDocumentsResult")
+
 def search_page(gesetzesnummer: str, page: int = 1, page_size: int = 20) -> str:
     """
     Eine Ergebnisseite suchen; Rückgabe: embedded XML (String).
     """
-    query = (
-        "<Suche>"
-        "  <Bundesrecht>"
-        "    <BrKons>"
-        f"      <Gesetzesnummer>{gesetzesnummer}</Gesetzesnummer>"
-        "    </BrKons>"
-        "  </Bundesrecht>"
-        "</Suche>"
-    )
-    body = (
-        f'<SearchDocuments xmlns="{NS_SVC}">'
-        f'  <query xmlns="{NS_SVC}">{query}</query>'
-        f'  <pageNumber>{page}</pageNumber>'
-        f'  <pageSize>{page_size}</pageSize>'
-        f'</SearchDocuments>'
-    )
-    root = post_soap(f"{NS_SVC}/SearchDocuments", soap_envelope(body))
-    try:
-        with open("last_search_envelope.xml", "w", encoding="utf-8") as dbg:
-            dbg.write(etree.tostring(root, encoding="unicode"))
-    except Exception:
-        pass
-    res = root.find(f".//{{{NS_SVC}}}SearchDocumentsResult")
-    embedded = result_embedded_xml(res)
-    try:
-        with open("last_search_embedded.xml", "w", encoding="utf-8") as f:
-            f.write(embedded)
-    except Exception:
-        pass
+    embedded = result_embedded_xml(_search_result(gesetzesnummer, page, page_size))
+    if logger.isEnabledFor(logging.DEBUG):
+        try:
+            with open("last_search_embedded.xml", "w", encoding="utf-8") as f:
+                f.write(embedded)
+        except OSError:
+            pass
     return embedded
 
 def extract_docrefs(embedded_xml: str) -> List[Dict[str, str]]:
@@ -50,16 +76,16 @@ def extract_docrefs(embedded_xml: str) -> List[Dict[str, str]]:
     except Exception as e:
         print("[ERR] embedded_xml nicht parsebar:", e)
         return []
-
     refs: List[Dict[str, str]] = []
-    for ref in root.xpath("//*[local-name()='OgdDocumentReference']"):
-        el_id = ref.xpath(".//*[local-name()='Technisch']/*[local-name()='ID']")
+    # iter() schließt root selbst ein – wie "//" auf dem eingebetteten Dokument
+    for ref in root.iter(_TAG_DOC_REF):
+        el_id = _XP_TECH_ID(ref)
         doc_id = (el_id[0].text or "").strip() if el_id and el_id[0].text else ""
         if not doc_id:
-            any_id = ref.xpath(".//*[local-name()='ID']")
-            doc_id = (any_id[0].text or "").strip() if any_id and any_id[0].text else ""
+            any_id = next(ref.iter(_TAG_ID), None)  # erstes ID in Dokumentreihenfolge
+            doc_id = (any_id.text or "").strip() if any_id is not None and any_id.text else ""
         if not doc_id or not doc_id.startswith("NOR"):
             continue
-        url = f"https://www.ris.bka.gv.at/Dokumente/Bundesnormen/{doc_id}/{doc_id}.html"
+        url = f"{BUNDESNORMEN_DOC_BASE}/{doc_id}/{doc_id}.html"
         refs.append({"id": doc_id, "url": url})
-    return refs
\ No newline at end of file
+    return refs
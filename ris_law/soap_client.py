@@ -1,40 +1,56 @@
+from __future__ import annotations
+
 import logging
 
 from lxml import etree
 
-from .config import BASE_URL, NS_SOAP, NS_SVC, HEADERS_SOAP, USER_AGENT
-from .exceptions import RisSoapError
+from .config import BASE_URL, NORMDOKUMENT_URL, NS_SOAP, NS_SVC, HEADERS_SOAP, USER_AGENT
+from .exceptions import RisLawError, RisSoapError
 from .http_client import get_default_http_client
+from .lxml_util import node_text, parse_html_document
 
 logger = logging.getLogger(__name__)
 
-def soap_envelope(inner_xml: str) -> str:
-    return (
-        '<?xml version="1.0" encoding="utf-8"?>'
-        f'<soap:Envelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
-        f'xmlns:xsd="http://www.w3.org/2001/XMLSchema" '
-        f'xmlns:soap="{NS_SOAP}"><soap:Body>{inner_xml}</soap:Body></soap:Envelope>'
-    )
-
-def post_soap(action: str, body_xml: str, timeout: int = 120) -> etree._Element:
-    h = dict(HEADERS_SOAP)
-    h["SOAPAction"] = action
-    h["User-Agent"] = USER_AGENT
+# Envelope-Gerüst einmal beim Import als UTF-8-Bytes; pro Aufruf wird nur
+# noch der Body dazwischengesetzt
+_ENVELOPE_HEAD = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    f'<soap:Envelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+    f'xmlns:xsd="http://www.w3.org/2001/XMLSchema" '
+    f'xmlns:soap="{NS_SOAP}"><soap:Body>'
+).encode("utf-8")
+_ENVELOPE_TAIL = b"</soap:Body></soap:Envelope>"
+
+# feste SOAP-Header; pro Aufruf kommt nur SOAPAction dazu
+_SOAP_HEADERS = {**HEADERS_SOAP, "User-Agent": USER_AGENT}
+
+def soap_envelope(inner_xml: str | bytes) -> bytes:
+    """SOAP-Envelope um `inner_xml` – direkt als UTF-8-Bytes für post_soap."""
+    if isinstance(inner_xml, str):
+        inner_xml = inner_xml.encode("utf-8")
+    return b"".join((_ENVELOPE_HEAD, inner_xml, _ENVELOPE_TAIL))
+
+def post_soap(action: str, body_xml: str | bytes, timeout: int = 120) -> etree._Element:
+    h = {**_SOAP_HEADERS, "SOAPAction": action}
+    if isinstance(body_xml, str):
+        body_xml = body_xml.encode("utf-8")
     client = get_default_http_client()
     try:
         resp = client.post(
             BASE_URL,
-            data=body_xml.encode("utf-8"),
+            data=body_xml,
             headers=h,
             timeout=timeout,
         )
     except Exception as exc:  # noqa: BLE001
         raise RisSoapError(str(exc)) from exc
-    try:
-        with open("last_envelope_raw.xml", "w", encoding="utf-8") as dbg:
-            dbg.write(resp.text)
-    except Exception:  # noqa: BLE001
-        pass
+    if logger.isEnabledFor(logging.DEBUG):
+        # Roh-Envelope zur Fehlersuche – nur im Debug-Modus, Bytes ohne Dekodieren
+        try:
+            with open("last_envelope_raw.xml", "wb") as dbg:
+                dbg.write(resp.content)
+        except OSError:
+            pass
     try:
         return etree.fromstring(resp.content)
     except Exception as exc:  # noqa: BLE001
@@ -61,12 +77,12 @@ def version_check() -> None:
 # ---------------------------------------------------------------------------
 
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, Tuple, Iterable
 import re
 from urllib.parse import urlencode
-from bs4 import BeautifulSoup, NavigableString, Tag
 
-RIS_NORMDOK_BASE = "https://www.ris.bka.gv.at/NormDokument.wxe"
+RIS_NORMDOK_BASE = NORMDOKUMENT_URL
 
 _HTML_HEADERS = {
     "User-Agent": USER_AGENT or "Mozilla/5.0 (compatible; RISLawMeta/1.0)",
@@ -88,26 +104,31 @@ _AT_MONTHS = {
     "dezember": 12,
 }
 
+# Whitespace-Läufe (\s umfasst auch das geschützte Leerzeichen \xa0)
+_RX_WS = re.compile(r"\s+")
+# Datumsformen für _normalize_date: 1.1.2000 / 2000-01-01 / 1. Jänner 2000
+_RX_DATE_DMY = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4})$")
+_RX_DATE_ISO = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})$")
+_RX_DATE_DMONY = re.compile(r"(\d{1,2})\.\s*([A-Za-zäöüÄÖÜß]+)\.?\s+(\d{4})", re.IGNORECASE)
+
 def _normalize_ws(s: str) -> str:
     if not s:
         return s
-    s = s.replace("\xa0", " ")
-    s = re.sub(r"\s+", " ", s)
-    return s.strip()
+    return _RX_WS.sub(" ", s).strip()
 
 def _normalize_date(d: str) -> str:
     if not d:
         return d
     s = _normalize_ws(d)
-    m = re.match(r"(\d{1,2})\.(\d{1,2})\.(\d{4})$", s)
+    m = _RX_DATE_DMY.match(s)
     if m:
         dd, mm, yyyy = m.groups()
         return f"{yyyy}-{int(mm):02d}-{int(dd):02d}"
-    m = re.match(r"(\d{4})-(\d{1,2})-(\d{1,2})$", s)
+    m = _RX_DATE_ISO.match(s)
     if m:
         yyyy, mm, dd = m.groups()
         return f"{int(yyyy):04d}-{int(mm):02d}-{int(dd):02d}"
-    m = re.match(r"(\d{1,2})\.\s*([A-Za-zäöüÄÖÜß]+)\.?\s+(\d{4})", s, flags=re.IGNORECASE)
+    m = _RX_DATE_DMONY.match(s)
     if m:
         dd, mon, yyyy = m.groups()
         mon_key = (
@@ -123,44 +144,57 @@ def _normalize_date(d: str) -> str:
 _DATE_RX = re.compile(
     r"(?P<d>\d{1,2}\.\d{1,2}\.\d{4}|\d{1,2}\.\s*[A-Za-zäöüÄÖÜß]+\.?\s+\d{4}|\d{4}-\d{1,2}-\d{1,2})"
 )
+# Fließtext-Fallbacks: „tritt mit <Datum> in Kraft“ bzw. „BGBl … vom <Datum>“
+_RX_IN_KRAFT = re.compile(r"tritt\s+mit\s+" + _DATE_RX.pattern + r"\s+in\s+kraft", re.IGNORECASE)
+_RX_BGBL_VOM = re.compile(r"\bBGBl\b[^.,;]*?\bvom\s+" + _DATE_RX.pattern, re.IGNORECASE)
+
+# Geschwister nach einem Knoten in Dokumentreihenfolge – Elemente, Texte
+# (lxml: tails) und Kommentare – in EINER Abfrage statt getnext()/tail-Schritten
+_XP_FOLLOWING = etree.XPath("following-sibling::node()[position() <= $n]")
 
-def _iter_forward_text_after(node: Tag, stop_at_h3: bool = True, max_nodes: int = 25) -> Iterable[str]:
+
+def _iter_forward_text_after(node, stop_at_h3: bool = True, max_nodes: int = 25) -> Iterable[str]:
     """
     Geht ab 'node' in Dokumentreihenfolge weiter und liefert Textstücke,
     bis max_nodes erreicht sind oder (optional) das nächste <h3> kommt.
+    Zählt wie früher bs4: jedes Geschwister-Element und jeden Text dazwischen
+    als einen Knoten.
     """
-    count = 0
-    cur = node.next_sibling
-    while cur and count < max_nodes:
-        if isinstance(cur, NavigableString):
-            txt = _normalize_ws(str(cur))
-            if txt:
-                yield txt
-        elif isinstance(cur, Tag):
-            if stop_at_h3 and cur.name and cur.name.lower() == "h3":
-                break
+    for sib in _XP_FOLLOWING(node, n=max_nodes):
+        if isinstance(sib, str):
+            t = sib  # Textknoten
+        elif not isinstance(sib.tag, str):
+            # Kommentar: bs4 lieferte dessen Inhalt wie einen Textknoten
+            t = sib.text or ""
+        elif stop_at_h3 and sib.tag == "h3":
+            break
+        elif sib.tag in ("script", "style"):
+            # bs4 lieferte für das script/style-Element selbst dessen Inhalt
+            t = sib.text or ""
+        else:
             # eigener Text
-            t = _normalize_ws(cur.get_text(" ", strip=True))
-            if t:
-                yield t
-        count += 1
-        cur = cur.next_sibling
+            t = node_text(sib)
+        t = _normalize_ws(t)
+        if t:
+            yield t
 
-def _find_date_near_heading(soup: BeautifulSoup, heading_keywords: Iterable[str]) -> Optional[str]:
+def _find_date_near_heading(tree, heading_keywords: Iterable[str]) -> Optional[str]:
     """
     Sucht ein <h3>, dessen Text einen der 'heading_keywords' enthält,
     und findet das erste Datum im nachfolgenden Text (einige Geschwister weiter),
     bevor das nächste <h3> beginnt.
     """
-    for h in soup.find_all("h3"):
-        htxt = _normalize_ws(h.get_text(" ", strip=True)).lower()
+    searched = set()  # Container ohne Datum – Geschwister-<h3> teilen sich oft einen
+    for h in tree.iter("h3"):
+        htxt = _normalize_ws(node_text(h)).lower()
         if any(kw in htxt for kw in heading_keywords):
             # 1) direkt im selben Container?
-            parent_text = _normalize_ws(h.parent.get_text(" ", strip=True)) if h.parent else ""
-            if parent_text:
-                m = _DATE_RX.search(parent_text)
+            parent = h.getparent()
+            if parent is not None and parent not in searched:
+                m = _DATE_RX.search(_normalize_ws(node_text(parent)))
                 if m:
                     return _normalize_date(m.group("d"))
+                searched.add(parent)
             # 2) in den nächsten Geschwistern (bis zum nächsten <h3>)
             for chunk in _iter_forward_text_after(h, stop_at_h3=True, max_nodes=20):
                 m = _DATE_RX.search(chunk)
@@ -168,30 +202,66 @@ def _find_date_near_heading(soup: BeautifulSoup, heading_keywords: Iterable[str]
                     return _normalize_date(m.group("d"))
     return None
 
-def _fetch_ris_html(gesetzesnummer: str) -> Optional[str]:
-    base = {"Abfrage": "Bundesnormen", "Gesetzesnummer": gesetzesnummer, "Uebergangsrecht": "", "Anlage": ""}
-    for key, val in (("Paragraf", "0"), ("Artikel", "0"), ("Paragraf", "1"), ("Artikel", "1")):
-        q = dict(base); q[key] = val
-        url = f"{RIS_NORMDOK_BASE}?{urlencode(q)}"
-        try:
-            r = requests.get(url, headers=_HTML_HEADERS, timeout=30)
-            if r.status_code == 200 and "<html" in r.text.lower():
-                return r.text
-        except requests.RequestException:
-            pass
+# Varianten der §0/Art.0-Seite in Prioritätsreihenfolge
+_METADATA_PAGE_VARIANTS = (("Paragraf", "0"), ("Artikel", "0"), ("Paragraf", "1"), ("Artikel", "1"))
+_RX_HTML_TAG = re.compile(rb"<html", re.IGNORECASE)
+
+
+def _fetch_ris_html_variant(client, gesetzesnummer: str, key: str, val: str) -> Optional[str]:
+    q = {"Abfrage": "Bundesnormen", "Gesetzesnummer": gesetzesnummer, "Uebergangsrecht": "", "Anlage": ""}
+    q[key] = val
+    url = f"{RIS_NORMDOK_BASE}?{urlencode(q)}"
+    try:
+        r = client.get(url, headers=_HTML_HEADERS, timeout=30)
+    except RisLawError:  # 404 / Netzfehler → nächste Variante
+        return None
+    # Prüfung auf den Roh-Bytes – dekodiert wird nur die gewählte Seite
+    if r.status_code == 200 and _RX_HTML_TAG.search(r.content):
+        return r.text
     return None
 
-def _extract_title(html: str) -> Optional[str]:
-    soup = BeautifulSoup(html, "lxml")
-    if soup.title and soup.title.string:
-        t = _normalize_ws(soup.title.string)
+
+def _fetch_ris_html(gesetzesnummer: str) -> Optional[str]:
+    # gemeinsamer Client: Keep-Alive-Pool, Retries, ggf. Disk-Cache
+    client = get_default_http_client()
+    # Regelfall §0 zuerst allein – nur wenn es die Seite nicht gibt, die übrigen
+    # Varianten parallel statt nacheinander (je bis zu 30 s) abfragen
+    (key, val), *rest = _METADATA_PAGE_VARIANTS
+    html = _fetch_ris_html_variant(client, gesetzesnummer, key, val)
+    if html is not None:
+        return html
+    pool = ThreadPoolExecutor(max_workers=len(rest))
+    try:
+        futures = [pool.submit(_fetch_ris_html_variant, client, gesetzesnummer, k, v) for k, v in rest]
+        # Ergebnis in Prioritätsreihenfolge, nicht in Ankunftsreihenfolge
+        for fut in futures:
+            html = fut.result()
+            if html is not None:
+                return html
+        return None
+    finally:
+        # nicht mehr gebrauchte Varianten nicht abwarten
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _extract_title(tree) -> Optional[str]:
+    """Titel aus <title>, sonst aus dem ersten <h1> eines geparsten Baums."""
+    if tree is None:
+        return None
+    title = tree.find(".//title")
+    # bs4 .string: nur, wenn <title> genau einen Textknoten enthält
+    if title is not None and title.text and not len(title):
+        t = _normalize_ws(title.text)
         if t: return t
-    h1 = soup.find("h1")
-    if h1:
-        t = _normalize_ws(h1.get_text(" ", strip=True))
+    h1 = tree.find(".//h1")
+    if h1 is not None:
+        t = _normalize_ws(node_text(h1))
         if t: return t
     return None
 
+# Gesetzes-Metadaten pro Gesetzesnummer (nur erfolgreiche Abrufe) – mehrere
+# Exporte desselben Gesetzes im Prozess laden §0/Art.0 nur einmal
+_law_metadata_cache: Dict[str, Dict[str, Optional[str]]] = {}
+
 def get_law_metadata(gesetzesnummer: str) -> Dict[str, Optional[str]]:
     """
     Liefert: date_in_force, date_out_of_force, kundmachungsdatum, title.
@@ -199,60 +269,52 @@ def get_law_metadata(gesetzesnummer: str) -> Dict[str, Optional[str]]:
       - §0/Art.0 laden
       - Datum direkt „nahe“ den <h3>-Überschriften suchen
       - sonst breiter Fallback im Plaintext
+    Ergebnisse werden pro Prozess memoisiert; geliefert wird jeweils eine Kopie.
     """
-    html = _fetch_ris_html(gesetzesnummer)
-    if not html:
-        return {"date_in_force": None, "date_out_of_force": None, "kundmachungsdatum": None, "title": None}
+    meta = _law_metadata_cache.get(gesetzesnummer)
+    if meta is None:
+        html = _fetch_ris_html(gesetzesnummer)
+        if not html:
+            return {"date_in_force": None, "date_out_of_force": None, "kundmachungsdatum": None, "title": None}
+        meta = _law_metadata_cache[gesetzesnummer] = _law_metadata_from_html(html)
+    return dict(meta)
 
-    soup = BeautifulSoup(html, "lxml")
-    title = _extract_title(html)
+def _law_metadata_from_html(html: str) -> Dict[str, Optional[str]]:
+    tree = parse_html_document(html)
+    meta = parse_dates_from_html(tree)  # derselbe Baum – kein zweiter Parse
+    meta["title"] = _extract_title(tree)
+    return meta
 
-    # 1) gezielt an den Überschriften suchen
-    date_in  = _find_date_near_heading(soup, ("inkrafttret",))
-    date_out = _find_date_near_heading(soup, ("außerkraft", "ausserkraft"))
-    date_pub = _find_date_near_heading(soup, ("kundmachungsdatum", "kundmachung"))
-
-    # 2) Fallback: ganzer Plaintext
-    if not (date_in and date_pub):
-        txt = _normalize_ws(soup.get_text(" ", strip=True))
-        m_in  = re.search(r"tritt\s+mit\s+" + _DATE_RX.pattern + r"\s+in\s+kraft", txt, flags=re.IGNORECASE)
-        m_pub = re.search(r"\bBGBl\b[^.,;]*?\bvom\s+" + _DATE_RX.pattern, txt, flags=re.IGNORECASE)
-        if not date_in and m_in:
-            date_in = _normalize_date(m_in.group(1))
-        if not date_pub and m_pub:
-            date_pub = _normalize_date(m_pub.group(1))
-
-    return {
-        "date_in_force": date_in,
-        "date_out_of_force": date_out,
-        "kundmachungsdatum": date_pub,
-        "title": title,
-    }
-
-def parse_dates_from_html(html: str) -> dict:
+def parse_dates_from_html(html) -> dict:
     """
     Extrahiert date_in_force, date_out_of_force, kundmachungsdatum aus einer
     RIS-HTML-Seite (egal ob Gesetzes- oder Einheitsseite).
-    Nutzt die vorhandenen Normalizer/Heuristiken in dieser Datei.
+    Nimmt HTML-Text oder einen bereits geparsten lxml-Baum (parse_html_document).
+    Strategie:
+      - Datum direkt „nahe“ den <h3>-Überschriften suchen
+      - sonst breiter Fallback im Plaintext (BGBl / „tritt mit … in Kraft“)
     """
-    if not html:
+    if html is None or isinstance(html, str):
+        tree = parse_html_document(html) if html else None
+    else:
+        tree = html
+    if tree is None:
         return {"date_in_force": None, "date_out_of_force": None, "kundmachungsdatum": None}
 
-    soup = BeautifulSoup(html, "lxml")
-
-    date_in  = _find_date_near_heading(soup, ("inkrafttret",))
-    date_out = _find_date_near_heading(soup, ("außerkraft", "ausserkraft"))
-    date_pub = _find_date_near_heading(soup, ("kundmachungsdatum", "kundmachung"))
+    date_in  = _find_date_near_heading(tree, ("inkrafttret",))
+    date_out = _find_date_near_heading(tree, ("außerkraft", "ausserkraft"))
+    date_pub = _find_date_near_heading(tree, ("kundmachungsdatum", "kundmachung"))
 
-    # großzügiger Fallback auf Fließtext (BGBl / „tritt mit … in Kraft“)
+    # großzügiger Fallback auf Fließtext – der Plaintext wird nur einmal gebaut
     if not (date_in and date_pub):
-        txt = _normalize_ws(soup.get_text(" ", strip=True))
-        m_in  = re.search(r"tritt\s+mit\s+" + _DATE_RX.pattern + r"\s+in\s+kraft", txt, flags=re.IGNORECASE)
-        m_pub = re.search(r"\bBGBl\b[^.,;]*?\bvom\s+" + _DATE_RX.pattern, txt, flags=re.IGNORECASE)
-        if not date_in and m_in:
-            date_in = _normalize_date(m_in.group("d") if "d" in m_in.groupdict() else m_in.group(1))
-        if not date_pub and m_pub:
-            date_pub = _normalize_date(m_pub.group("d") if "d" in m_pub.groupdict() else m_pub.group(1))
+        txt = _normalize_ws(node_text(tree))
+        # nur die fehlenden Muster über den (langen) Plaintext laufen lassen
+        m_in  = None if date_in else _RX_IN_KRAFT.search(txt)
+        m_pub = None if date_pub else _RX_BGBL_VOM.search(txt)
+        if m_in:
+            date_in = _normalize_date(m_in.group("d"))
+        if m_pub:
+            date_pub = _normalize_date(m_pub.group("d"))
 
     return {
         "date_in_force": date_in,
@@ -1,17 +1,21 @@
+import json
 import logging
 import re
-import time
 import urllib.parse as _url
+from functools import lru_cache
 from typing import List, Tuple, Dict, Optional
 
-from bs4 import BeautifulSoup
+from lxml import etree
 
-from .http_client import HttpClient
+from .cache import ResponseCache, get_default_cache
+from .config import NORMDOKUMENT_URL
+from .http_client import HttpClient, get_default_http_client
+from .lxml_util import node_text, parse_html_document
 
 # -----------------------------------------------------
 # Offizielle §0-Seite (Inhaltsverzeichnis) im RIS
 # -----------------------------------------------------
-RIS_TOC_URL = "https://www.ris.bka.gv.at/NormDokument.wxe"
+RIS_TOC_URL = NORMDOKUMENT_URL
 
 DEFAULT_HEADERS = {
     "User-Agent": "RIS-Law-Scraper/1.1 (+https://github.com/yourrepo; contact: you@example.com)"
@@ -19,6 +23,51 @@ DEFAULT_HEADERS = {
 
 logger = logging.getLogger(__name__)
 
+# Das Inhaltsverzeichnis ändert sich selten – Snapshot auf Platte für 24 h
+TOC_SNAPSHOT_TTL = 24 * 3600
+
+_default_cache = get_default_cache()
+_toc_snapshots: Optional[ResponseCache] = (
+    ResponseCache(
+        _default_cache.directory / "toc",
+        ttl=TOC_SNAPSHOT_TTL,
+        refresh=_default_cache.refresh,
+    )
+    if _default_cache is not None
+    else None
+)
+
+
+# Query-Parameter "Paragraf=<wert>" innerhalb des Query-Strings
+_RX_PARA_QUERY = re.compile(r"(?:^|&)Paragraf=([^&]*)")
+
+# Anker "#Paragraf1a" (bzw. "#paragraf1a")
+_RX_PARA_ANCHOR = re.compile(r"#(?:Paragraf|paragraf)(\d+[a-zA-Z]?)")
+
+# Volltext-Fallback in EINEM Durchlauf: jede §-ID ("§ 1", "§ 1a") ...
+_RX_PARA_FALLBACK = re.compile(r"§\s*(?P<num>\d+)(?P<suffix>[a-zA-Z]?)")
+# ... und, direkt dahinter verankert, ein Aufhebungs-Marker innerhalb der
+# nächsten 30 Zeichen (z. B. "§ 3 (aufgehoben)", "§ 4 (weggefallen)").
+_RX_AUFHEBUNG_MARKER = re.compile(r".{0,30}?(?:aufgehoben|weggefallen)", re.IGNORECASE)
+
+
+# Whitespace-Läufe (inkl. Zeilenumbrüche, NBSP) für den Linktext
+_RX_WS = re.compile(r"\s+")
+
+
+# Sortierschlüssel: numerischer Teil + Buchstabe ("17a" → (17, "a"))
+_RX_SORT_KEY = re.compile(r"(\d+)([a-zA-Z]?)")
+
+
+def _toc_sort_key(pid: str):
+    # Schnellpfad für den Normalfall rein numerischer IDs ("17")
+    if pid.isascii() and pid.isdigit():
+        return (int(pid), "")
+    m = _RX_SORT_KEY.match(pid)
+    if not m:
+        return (999999, pid)
+    return (int(m.group(1)), m.group(2))
+
 
 def _extract_paragraph_from_href(href: str) -> Optional[str]:
     """
@@ -28,20 +77,33 @@ def _extract_paragraph_from_href(href: str) -> Optional[str]:
       - #Paragraf1
       - #Paragraf1a
     """
-    # Direkte Query ?Paragraf=...
-    parsed = _url.urlparse(href)
-    qs = _url.parse_qs(parsed.query)
-    if "Paragraf" in qs and qs["Paragraf"]:
-        return qs["Paragraf"][0].strip()
+    # Direkte Query ?Paragraf=... (erster nicht-leerer Wert, wie parse_qs)
+    end = href.find("#")
+    if end < 0:
+        end = len(href)
+    q = href.find("?", 0, end)
+    if q >= 0:
+        query = href[q + 1:end]
+        for m in _RX_PARA_QUERY.finditer(query):
+            if m.group(1):
+                return _url.unquote_plus(m.group(1)).strip()
 
     # oder Anker #Paragraf1 (bzw. #paragraf1)
-    m = re.search(r"#(?:Paragraf|paragraf)(\d+[a-zA-Z]?)", href)
+    m = _RX_PARA_ANCHOR.search(href)
     if m:
         return m.group(1).strip()
 
     return None
 
 
+def _get_text_collapsed(node) -> str:
+    """
+    Wie " ".join(node_text(node).split()), aber in einem Regex-Durchlauf
+    statt Strip pro Textstück, Join, Split und erneutem Join.
+    """
+    return _RX_WS.sub(" ", " ".join(node.itertext())).strip()
+
+
 def _has_aufgehoben_marker(text: str) -> bool:
     """
     Ermittelt, ob im Kontexttext erkennbar ist, dass die Norm "aufgehoben"
@@ -62,18 +124,21 @@ def fetch_toc_html(
     gesetzesnummer: str = "10002296",
     fassung_vom: Optional[str] = None,
     timeout: int = 20,
-    tries: int = 2,
+    tries: Optional[int] = None,
     headers: Optional[Dict[str, str]] = None,
+    client: HttpClient | None = None,
 ) -> str:
     """
     Lädt die Inhaltsverzeichnis-Seite (§ 0) für ein Gesetz aus dem RIS.
 
     - timeout: Timeout pro HTTP-Request in Sekunden
-    - tries:   Anzahl der Versuche, bevor ein Fehler geworfen wird
+    - tries:   Anzahl der Versuche; Standard sind die Retries des Clients.
+               Gilt nur ohne eigenen `client` (dessen Einstellung hat Vorrang).
+    - client:  HTTP-Client; Standard ist der gemeinsame Client (Keep-Alive-Pool,
+               Retries mit Back-off für 429/5xx und zu kurze Antworten)
 
-    NEU:
-      - kürzeres Timeout und weniger Versuche, damit das Skript nicht ewig "hängt"
-      - Debug-Ausgaben, damit man sieht, ob der TOC-Request überhaupt rausgeht
+    Wirft RisFetchError, wenn nach allen Versuchen keine vollständige
+    TOC-Seite (> 2000 Zeichen) geladen werden konnte.
     """
     headers = {**DEFAULT_HEADERS, **(headers or {})}
     params = {
@@ -87,63 +152,29 @@ def fetch_toc_html(
     if fassung_vom:
         params["FassungVom"] = fassung_vom
 
-    client = HttpClient(retries=1)
-    last_text: Optional[str] = None
-    last_error: Optional[Exception] = None
-
-    for i in range(tries):
-        attempt = i + 1
-        logger.info(
-            "[RIS] TOC-Request (%s/%s) für Gesetzesnummer %s (Paragraf=0)...",
-            attempt,
-            tries,
-            gesetzesnummer,
-        )
-        try:
-            r = client.get(
-                RIS_TOC_URL,
-                headers=headers,
-                params=params,
-                timeout=timeout,
-                allow_redirects=True,
-            )
-            last_text = r.text
-            text_len = len(r.text or "")
-            if r.status_code == 200 and text_len > 2000:
-                logger.info("[RIS] TOC erfolgreich geladen (Status=200, Länge=%s).", text_len)
-                return r.text
-
-            logger.warning(
-                "[RIS] Unerwartete TOC-Antwort (Status=%s, Länge=%s) für Gesetzesnummer %s – neuer Versuch...",
-                r.status_code,
-                text_len,
-                gesetzesnummer,
-            )
-        except Exception as exc:  # noqa: BLE001
-            last_error = exc
-            logger.warning(
-                "[RIS] Fehler beim TOC-Request (Versuch %s): %s",
-                attempt,
-                exc,
-            )
-        time.sleep(1.5 * attempt)
-
-    # Nach allen Versuchen
-    if last_text is not None:
-        logger.warning(
-            "[RIS] Letzter TOC-Versuch fehlgeschlagen (Länge=%s).",
-            len(last_text or ""),
-        )
-        if last_error:
-            raise last_error
-        return last_text
-
-    raise RuntimeError(
-        f"Fehler beim Laden der TOC-Seite für Gesetzesnummer {gesetzesnummer}"
+    if client is None:
+        client = get_default_http_client()
+        # nur ein abweichendes `tries` braucht einen eigenen Client
+        if tries is not None and client.retries != tries:
+            client = HttpClient(retries=tries, cache=get_default_cache())
+    logger.info("[RIS] TOC-Request für Gesetzesnummer %s (Paragraf=0)...", gesetzesnummer)
+    r = client.get(
+        RIS_TOC_URL,
+        headers=headers,
+        params=params,
+        timeout=timeout,
+        allow_redirects=True,
+        min_content_length=2001,
+        cache_ttl=TOC_SNAPSHOT_TTL,  # Inhaltsverzeichnis höchstens einen Tag alt
     )
+    # einmal dekodieren; ohne Charset-Header gilt UTF-8 (wie vom RIS ausgeliefert)
+    # statt einer Zeichensatz-Erkennung über den gesamten Body
+    html = r.content.decode(r.encoding or "utf-8", "replace")
+    logger.info("[RIS] TOC erfolgreich geladen (Status=%s, Länge=%s).", r.status_code, len(html))
+    return html
 
 
-def parse_toc(html: str, include_aufgehoben: bool = True) -> Tuple[List[str], List[str]]:
+def parse_toc(html: str | bytes, include_aufgehoben: bool = True) -> Tuple[List[str], List[str]]:
     """
     Parst die Inhaltsverzeichnis-Seite und extrahiert:
       - Liste aller Paragraph-IDs (z.B. "1", "1a", "2", "3", ...)
@@ -153,16 +184,24 @@ def parse_toc(html: str, include_aufgehoben: bool = True) -> Tuple[List[str], Li
       - True:  aufhebungs-Marker werden ausgewertet
       - False: aufhebungsstatus wird ignoriert
     """
-    soup = BeautifulSoup(html, "html.parser")
+    tree = parse_html_document(html)
+    if tree is None:  # leeres Dokument
+        return [], []
+    # script/style tragen keinen sichtbaren Text (wie bei get_text() in bs4)
+    etree.strip_elements(tree, "script", "style", with_tail=False)
 
-    para_ids: List[str] = []
-    aufgehoben_ids: List[str] = []
+    # dicts als geordnete Mengen: deduplizieren direkt beim Einfügen
+    para_ids: Dict[str, None] = {}
+    aufgehoben_ids: Dict[str, None] = {}
 
     # -----------------------------
     # 1) Links mit Paragraf=... ODER #Paragraf...
     # -----------------------------
-    for a in soup.find_all("a", href=True):
-        href = a["href"] or ""
+    parent_texts: Dict[object, str] = {}
+    for a in tree.iter("a"):
+        href = a.get("href")
+        if href is None:
+            continue
         if ("Paragraf=" not in href) and ("#Paragraf" not in href and "#paragraf" not in href):
             # nicht relevant
             continue
@@ -171,52 +210,56 @@ def parse_toc(html: str, include_aufgehoben: bool = True) -> Tuple[List[str], Li
             continue
 
         # Kontexttext prüfen (für "aufgehoben"/"weggefallen")
-        text_block = " ".join(a.get_text(" ", strip=True).split())
-        parent_text = a.find_parent().get_text(" ", strip=True) if a.find_parent() else ""
+        text_block = _get_text_collapsed(a)
+        parent = a.getparent()
+        if parent is None:
+            parent_text = ""
+        else:
+            # mehrere Links teilen sich oft dieselbe Zeile/Zelle → Text nur einmal sammeln
+            parent_text = parent_texts.get(parent)
+            if parent_text is None:
+                parent_text = parent_texts[parent] = node_text(parent)
         context = f"{text_block} {parent_text}".strip()
         if _has_aufgehoben_marker(context):
-            aufgehoben_ids.append(para)
+            aufgehoben_ids[para] = None
 
-        para_ids.append(para)
+        para_ids[para] = None
 
     # Wenn nichts gefunden wurde, versuchen wir einen heuristischen Fallback über
     # den Volltext, z.B. für exotische Layouts.
     if not para_ids:
-        text = soup.get_text(" ", strip=True)
-        # Erkennung von Mustern wie "§ 1", "§ 1a", "§ 3 bis 7"
-        matches = re.findall(r"§\s*(\d+[a-zA-Z]?)", text)
-        para_ids.extend(matches)
-
-        # Aufhebungs-Marker heuristisch erkennen
-        if include_aufgehoben:
-            # z.B. "§ 3 (aufgehoben)", "§ 4 (weggefallen)"
-            aufhebungs_matches = re.findall(
-                r"§\s*(\d+[a-zA-Z]?).{0,30}?(aufgehoben|weggefallen)",
-                text,
-                flags=re.IGNORECASE,
-            )
-            aufgehoben_ids.extend([m[0] for m in aufhebungs_matches])
-
-    # Deduplizieren & sortieren
-    def _sort_key(pid: str):
-        # Split in numerischen Teil + Buchstaben
-        m = re.match(r"(\d+)([a-zA-Z]?)", pid)
-        if not m:
-            return (999999, pid)
-        num = int(m.group(1))
-        letter = m.group(2)
-        return (num, letter)
-
-    para_ids = sorted(set(para_ids), key=_sort_key)
-    aufgehoben_ids = sorted(set(aufgehoben_ids), key=_sort_key)
+        text = node_text(tree)
+        # Erkennung von Mustern wie "§ 1", "§ 1a", "§ 3 bis 7" und heuristisch
+        # aufgehobener §§ wie "§ 3 (aufgehoben)", "§ 4 (weggefallen)".
+        # Ein Treffer mit Marker "verbraucht" den Text bis zum Marker – davon
+        # überdeckte §§ zählen (wie bisher) nicht als aufgehoben.
+        consumed = 0
+        for m in _RX_PARA_FALLBACK.finditer(text):
+            pid = m.group("num") + m.group("suffix")
+            para_ids[pid] = None
+            if not include_aufgehoben or m.start() < consumed:
+                continue
+            marker = _RX_AUFHEBUNG_MARKER.match(text, m.end())
+            if marker is None and m.group("suffix"):
+                # Klebt der Marker an der Zahl ("§ 1Weggefallen", "§ 12aufgehoben"),
+                # gehört der Buchstabe zum Marker, nicht zur ID (wie bisher).
+                marker = _RX_AUFHEBUNG_MARKER.match(text, m.end("num"))
+                pid = m.group("num")
+            if marker is not None:
+                aufgehoben_ids[pid] = None
+                consumed = marker.end()
+
+    # Sortieren (bereits dedupliziert)
+    paragraphs = sorted(para_ids, key=_toc_sort_key)
 
     if not include_aufgehoben:
-        return para_ids, []
+        return paragraphs, []
 
     # Nur Paragraphen, die in para_ids vorkommen, als aufgehoben markieren
-    aufgehoben_ids = [pid for pid in aufgehoben_ids if pid in para_ids]
+    # (Dict-Lookup statt linearer Suche in der sortierten Liste)
+    aufgehoben = sorted((pid for pid in aufgehoben_ids if pid in para_ids), key=_toc_sort_key)
 
-    return para_ids, aufgehoben_ids
+    return paragraphs, aufgehoben
 
 
 def get_current_abgb_paragraphs(
@@ -236,12 +279,57 @@ def get_current_abgb_paragraphs(
         "aufgehoben": [...]
       }
     """
-    html = fetch_toc_html(gesetzesnummer=gesetzesnummer, fassung_vom=fassung_vom)
-    paragraphs, aufgehoben = parse_toc(html, include_aufgehoben=include_aufgehoben)
+    paragraphs, aufgehoben = _load_toc(gesetzesnummer, fassung_vom, include_aufgehoben)
     return {
         "gesetzesnummer": gesetzesnummer,
         "fassung_vom": fassung_vom or "geltende Fassung",
         "count": len(paragraphs),
-        "paragraphs": paragraphs,
-        "aufgehoben": aufgehoben,
+        "paragraphs": list(paragraphs),
+        "aufgehoben": list(aufgehoben),
     }
+
+
+def get_toc_paragraphs(
+    gesetzesnummer: str,
+    include_aufgehoben: bool = True,
+    fassung_vom: Optional[str] = None,
+) -> Tuple[str, ...]:
+    """
+    Nur die §-Liste des Inhaltsverzeichnisses, als unveränderliches Tupel
+    direkt aus dem Prozess-Cache – für Exporte, die sie nur durchlaufen.
+    """
+    return _load_toc(gesetzesnummer, fassung_vom, include_aufgehoben)[0]
+
+
+@lru_cache(maxsize=16)
+def _load_toc(
+    gesetzesnummer: str,
+    fassung_vom: Optional[str],
+    include_aufgehoben: bool,
+) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Lädt und parst das Inhaltsverzeichnis – einmal pro Prozess und, wenn
+    RIS_LAW_CACHE_DIR gesetzt ist, höchstens einmal pro TOC_SNAPSHOT_TTL.
+
+    Rückgabe als Tupel, damit der lru_cache-Eintrag nicht von Aufrufern
+    verändert werden kann.
+    """
+    key = f"toc:{gesetzesnummer}:{fassung_vom or ''}:{int(include_aufgehoben)}"
+    if _toc_snapshots is not None:
+        raw = _toc_snapshots.get(key)
+        if raw is not None:
+            try:
+                snap = json.loads(raw)
+                return tuple(snap["paragraphs"]), tuple(snap["aufgehoben"])
+            except (ValueError, KeyError, TypeError) as exc:
+                logger.warning("[RIS] TOC-Snapshot unlesbar (%s) – lade neu.", exc)
+
+    html = fetch_toc_html(gesetzesnummer=gesetzesnummer, fassung_vom=fassung_vom)
+    paragraphs, aufgehoben = parse_toc(html, include_aufgehoben=include_aufgehoben)
+
+    if _toc_snapshots is not None and paragraphs:
+        _toc_snapshots.set(
+            key,
+            json.dumps({"paragraphs": paragraphs, "aufgehoben": aufgehoben}).encode("utf-8"),
+        )
+    return tuple(paragraphs), tuple(aufgehoben)
@@ -23,6 +23,9 @@ STATE_FILE = "ris_law_state.json"
 # Flag, damit wir die Beispiel-Metadaten nur EINMAL ausgeben
 PRINTED_EXAMPLE = False
 
+# bis zu MAX_PAGES Abrufe an denselben Host → eine Session (Keep-Alive)
+SESSION = requests.Session()
+
 
 # -------------------- State-Handling -------------------- #
 
@@ -95,7 +98,7 @@ def fetch_page(page: int, page_size: int = 100) -> dict | None:
 
     print(f"[INFO] Request Seitennummer={page}, DokumenteProSeite={dps} -> {BASE_URL}")
     try:
-        r = requests.get(BASE_URL, params=params, timeout=60)
+        r = SESSION.get(BASE_URL, params=params, timeout=60)
         r.raise_for_status()
     except requests.RequestException as e:
         print(f"[ERROR] Request für Seitennummer {page} fehlgeschlagen: {e}")
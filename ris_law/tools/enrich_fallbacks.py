@@ -49,6 +49,10 @@ def log(msg: str):
     print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
 
 # ---------- HTTP + Cache ----------
+# eine Session für alle Abrufe: Keep-Alive statt TCP+TLS-Handshake pro Probe
+_SESSION = requests.Session()
+_SESSION.headers.update(DEFAULT_HEADERS)
+
 class NotFound404(Exception):
     pass
 
@@ -56,7 +60,7 @@ def http_get(url: str, timeout: int = REQUEST_TIMEOUT, tries: int = 3, backoff:
     last_exc = None
     for i in range(tries):
         try:
-            r = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout)
+            r = _SESSION.get(url, timeout=timeout)
             if r.status_code == 404:
                 raise NotFound404(f"404 for {url}")
             r.raise_for_status()
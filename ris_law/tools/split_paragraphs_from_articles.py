@@ -3,6 +3,19 @@ import re
 from pathlib import Path
 from typing import List, Dict
 
+try:  # optional (Extra "fast"): schneller Encoder/Decoder, liefert direkt UTF-8-Bytes
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps_line(row: Dict) -> bytes:
+    """Kompakte JSONL-Zeile – gleiche Ausgabe mit und ohne orjson."""
+    if orjson is not None:
+        return orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
 # Paragraph-Marker: "§ 1", "§ 1a", "§ 22", ...
 PARA_PATTERN = re.compile(r"(§\s*\d+[a-zA-Z]?)")
 
@@ -95,7 +108,7 @@ def split_file(input_path: str | Path, output_path: str | Path) -> int:
                 continue
 
             count_in += 1
-            row = json.loads(line)
+            row = orjson.loads(line) if orjson is not None else json.loads(line)
 
             # Nur Artikel wirklich splitten – andere Zeilen ggf. unverändert übernehmen
             if row.get("unit_type") != "artikel":
@@ -124,10 +137,9 @@ def split_file(input_path: str | Path, output_path: str | Path) -> int:
 
     # Ergebnis schreiben
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", encoding="utf-8") as fout:
-        for row in best_rows.values():
-            fout.write(json.dumps(row, ensure_ascii=False))
-            fout.write("\n")
+    with output_path.open("wb", buffering=1 << 20) as fout:
+        # eine write()-Operation pro Zeile, gepuffert
+        fout.writelines(_dumps_line(row) for row in best_rows.values())
 
     count_out = len(best_rows)
     print(f"[INFO] Fertig: {count_in} Eingabezeilen → {count_out} Paragraph-Zeilen.")
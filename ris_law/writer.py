@@ -1,16 +1,95 @@
 import json
 import logging
-import time
-from datetime import datetime
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from typing import Optional
 
-from .html_parser import extract_para_id, fetch_paragraph_text_via_html
-from .http_client import HttpClient, get_default_http_client
+from .concurrency import iter_ordered
+from .config import DEFAULT_MAX_WORKERS, LICENSE_NOTE
+from .html_parser import fetch_paragraph
+from .http_client import HttpClient, RateLimiter, get_default_http_client
 from .records import TocRecord
 
-license_note = "Datenquelle: RIS – https://www.ris.bka.gv.at/, Lizenz: CC BY 4.0"
+try:  # optional: C-Encoder, liefert direkt UTF-8-Bytes
+    import orjson
+except ImportError:  # pragma: no cover - orjson ist optional
+    orjson = None
+
+license_note = LICENSE_NOTE
 
 logger = logging.getLogger(__name__)
 
+# Schreibpuffer für JSONL-Ausgaben (weniger Syscalls bei vielen kleinen Zeilen)
+JSONL_BUFFER_SIZE = 1 << 20
+
+
+def dumps_jsonl_line(obj: dict) -> bytes:
+    """
+    Serialisiert einen Datensatz als kompakte UTF-8-JSONL-Zeile.
+    Nutzt orjson, falls installiert; die Ausgabe ist in beiden Fällen identisch.
+    """
+    if orjson is not None:
+        # Zeilenumbruch direkt im Encoder anhängen – keine zweite bytes-Kopie
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def utc_timestamp() -> str:
+    """Aktueller Zeitpunkt (UTC, Sekunden) – einmal pro Lauf für retrieved_at."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+
+_WRITER_DONE = object()
+
+
+class JsonlWriter:
+    """
+    Schreibt Datensätze in einem eigenen Thread als JSONL-Datei.
+
+    Serialisieren und Schreiben laufen damit neben der Verarbeitung im
+    aufrufenden Thread; die Reihenfolge der write()-Aufrufe bleibt erhalten.
+    Ein Schreibfehler wird spätestens beim Verlassen des with-Blocks geworfen.
+    """
+
+    def __init__(self, out_path: str, maxsize: int = 256) -> None:
+        self.out_path = out_path
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="jsonl-writer", daemon=True)
+
+    def __enter__(self) -> "JsonlWriter":
+        self._file = open(self.out_path, "wb", buffering=JSONL_BUFFER_SIZE)
+        self._thread.start()
+        return self
+
+    def write(self, obj: dict) -> None:
+        if self._error is not None:
+            raise self._error
+        self._queue.put(obj)
+
+    def _run(self) -> None:
+        while True:
+            obj = self._queue.get()
+            if obj is _WRITER_DONE:
+                return
+            if self._error is not None:
+                continue  # nach einem Fehler nur noch leeren, damit write() nicht blockiert
+            try:
+                self._file.write(dumps_jsonl_line(obj))
+            except BaseException as exc:  # noqa: BLE001 - wird im Aufrufer erneut geworfen
+                self._error = exc
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._queue.put(_WRITER_DONE)
+        self._thread.join()
+        self._file.close()
+        if exc_type is None and self._error is not None:
+            raise self._error
+
 
 def write_jsonl_from_docrefs(
     docrefs,
@@ -19,53 +98,69 @@ def write_jsonl_from_docrefs(
     gesetzesnummer: str = "10001622",
     law_name: str = "ABGB",
     client: HttpClient | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    limiter: RateLimiter | None = None,
 ) -> int:
     """
     Holt HTML-Seiten zu den Docrefs und schreibt sie als JSONL-Datei.
-    docrefs = [{'id': 'NOR123', 'url': '...'}, ...]
+    docrefs = [{'id': 'NOR123', 'url': '...'}, ...] – oder ein Iterator, dessen
+    Einträge schon verarbeitet werden, während er noch weitere liefert.
+
+    Die Seiten werden von `max_workers` Threads geladen; `delay` ist das
+    Mindestintervall zwischen zwei gestarteten Requests (über alle Threads);
+    ein übergebener `limiter` ersetzt ihn, z. B. um den Takt mit der
+    NOR-Auflösung zu teilen. Geschrieben wird über einen JsonlWriter-Thread, in Reihenfolge der Docrefs.
     """
     rows = 0
     client = client or get_default_http_client()
-    with open(out_path, "w", encoding="utf-8") as f:
-        for i, ref in enumerate(docrefs, start=1):
-            nor = ref.get("id", "")
-            url = ref.get("url", "")
-            logger.info("[Fetch] %s/%s – %s – %s", i, len(docrefs), nor or "(keine NOR)", url)
-            try:
-                parsed = fetch_paragraph_text_via_html(url, client=client)
-            except Exception as exc:  # noqa: BLE001
-                logger.error("[ERR] %s – %s", url, exc)
-                time.sleep(delay)
-                continue
-
-            heading = (parsed.get("heading") or "").strip()
-            text = (parsed.get("text") or "").strip()
-            if not nor:
-                nor = (parsed.get("nor") or "").strip()
-            if not text:
-                logger.warning("[WARN] Kein Text extrahiert für %s", nor or url)
-                time.sleep(delay)
-                continue
-
-            para_id = extract_para_id(heading or text)
-            retrieved_at = datetime.utcnow().isoformat() + "Z"
-
-            record = TocRecord(
-                law=law_name,
-                application="Bundesnormen(HTML)",
-                gesetzesnummer=gesetzesnummer,
-                source="RIS HTML",
-                license=license_note,
-                retrieved_at=retrieved_at,
-                document_number=nor or None,
-                url=url,
-                heading=heading or None,
-                paragraph_id=para_id or None,
-                text=text or None,
-            )
-
-            f.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
-            rows += 1
-            time.sleep(delay)
+    limiter = limiter or RateLimiter(delay)
+    total = len(docrefs) if hasattr(docrefs, "__len__") else "?"
+
+    # Für alle Datensätze gleiche Felder nur einmal binden; retrieved_at ist
+    # der Startzeitpunkt des Laufs (UTC)
+    make_record = partial(
+        TocRecord,
+        law=law_name,
+        application="Bundesnormen(HTML)",
+        gesetzesnummer=gesetzesnummer,
+        source="RIS HTML",
+        license=license_note,
+        retrieved_at=utc_timestamp(),
+    )
+
+    def _fetch_one(item) -> Optional[TocRecord]:
+        i, ref = item
+        nor = ref.get("id", "")
+        url = ref.get("url", "")
+        limiter.acquire()
+        logger.info("[Fetch] %s/%s – %s – %s", i, total, nor or "(keine NOR)", url)
+        try:
+            heading, text, parsed_nor, para_id = fetch_paragraph(url, client=client)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("[ERR] %s – %s", url, exc)
+            return None
+
+        nor = nor or parsed_nor
+        if not text:
+            logger.warning("[WARN] Kein Text extrahiert für %s", nor or url)
+            return None
+
+        return make_record(
+            document_number=nor or None,
+            url=url,
+            heading=heading or None,
+            paragraph_id=para_id or None,
+            text=text or None,
+        )
+
+    workers = max(1, max_workers)
+    with JsonlWriter(out_path) as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        # Höchstens 2 × workers Seiten unterwegs bzw. gepuffert; geschrieben wird
+        # in Eingabereihenfolge, sobald die jeweils älteste Seite fertig ist –
+        # ein Docref-Generator wird also nicht vorab leergezogen
+        for record in iter_ordered(pool, _fetch_one, enumerate(docrefs, start=1), 2 * workers):
+            if record is not None:
+                out.write(record.to_dict())
+                rows += 1
 
     return rows